@@ -1,11 +1,17 @@
 # agent.py - Interview Agent with Candidate Details (LiveKit 1.2+ API)
 import logging
 import asyncio
+import functools
+import gc
 import json
 import os
+import sys
+import time
+import uuid
 import warnings
 import httpx
-from dataclasses import dataclass, field
+import orjson
+from dataclasses import asdict, dataclass, field
 from typing import Optional, List
 from datetime import datetime
 from dotenv import load_dotenv
@@ -21,106 +27,318 @@ from livekit.plugins import openai, silero
 # Import evaluation and tracking modules
 from evaluator import AnswerEvaluator, get_evaluator
 from livekit_utils import LiveKitMessageSender, InterviewTracker
-from transcript_saver import TranscriptSaver, add_message
+from transcript_saver import TranscriptSaver, add_message, clear_buffer
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("interview-agent")
 load_dotenv()
 
+# Faster event loop for the media/LLM streaming plumbing. Installed at import time so
+# job subprocesses (which import this module but never run __main__) use it too.
+if sys.platform != "win32":
+    try:
+        import uvloop
+        uvloop.install()
+        logger.debug("⚡ uvloop event loop policy installed")
+    except ImportError:
+        pass
+
+# DEBUG_METADATA=1 turns on the env/metadata dumps below (logged at DEBUG level)
+DEBUG_METADATA = os.getenv("DEBUG_METADATA") == "1"
+if DEBUG_METADATA:
+    logger.setLevel(logging.DEBUG)
+
 # Debug: Environment Variables Check
-logger.info("🔍 Environment Variables Check:")
-logger.info(f"   LIVEKIT_URL: {os.getenv('LIVEKIT_URL')}")
-if os.getenv('LIVEKIT_API_KEY'):
-    logger.info(f"   LIVEKIT_API_KEY: {os.getenv('LIVEKIT_API_KEY')[:10]}...")
-else:
-    logger.info("   LIVEKIT_API_KEY: Not set")
-logger.info(f"   LIVEKIT_AGENT_NAME: {os.getenv('LIVEKIT_AGENT_NAME')}")
+if DEBUG_METADATA:
+    logger.debug("🔍 Environment Variables Check:")
+    logger.debug("   LIVEKIT_URL: %s", os.getenv('LIVEKIT_URL'))
+    if os.getenv('LIVEKIT_API_KEY'):
+        logger.debug("   LIVEKIT_API_KEY: %.10s...", os.getenv('LIVEKIT_API_KEY'))
+    else:
+        logger.debug("   LIVEKIT_API_KEY: Not set")
+    logger.debug("   LIVEKIT_AGENT_NAME: %s", os.getenv('LIVEKIT_AGENT_NAME'))
+
+# Model descriptors shared by every session in this worker. These are resolved
+# through LiveKit Inference, which reuses the job's HTTP context, so no
+# per-interview OpenAI/Deepgram/Cartesia clients are created here.
+STT_MODEL = os.getenv("AGENT_STT_MODEL", "deepgram/nova-2-general")
+LLM_MODEL = os.getenv("AGENT_LLM_MODEL", "openai/gpt-4o-mini")
+TTS_MODEL = os.getenv("AGENT_TTS_MODEL", "cartesia/sonic-3:9626c31c-bec5-4cca-baa8-f8ba9e84c8bc")
+
+# Turn-taking: silence (seconds) before a user turn is considered finished. Interview
+# answers contain thinking pauses, so this stays well above the 0.05s low-latency demos.
+MIN_ENDPOINTING_DELAY = float(os.getenv("AGENT_MIN_ENDPOINTING_DELAY", "0.3"))
+
+# Publish evaluation + stats as one composite "turn_update" event (frontend must handle it)
+BUNDLE_TURN_UPDATES = os.getenv("AGENT_BUNDLE_TURN_UPDATES") == "1"
+
+# STT can re-emit the same final transcript back-to-back; repeats inside this window are dropped
+DUPLICATE_ANSWER_WINDOW_S = 0.75
+
+# Optional pause before the greeting; session.start() has already wired audio I/O
+GREETING_DELAY_S = float(os.getenv("AGENT_GREETING_DELAY", "0"))
 
 
 # ========================== CANDIDATE DETAILS EXTRACTION ==========================
+def _loads(raw):
+    """Parse dispatch metadata with orjson, falling back to stdlib json for non-UTF-8 edge cases"""
+    if not isinstance(raw, (str, bytes)):
+        return raw
+    try:
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        # e.g. lone surrogates, which orjson rejects but json accepts
+        return json.loads(raw)
+
+
 def extract_candidate_details(ctx: agents.JobContext):
-    """Extract and log candidate details from metadata"""
+    """Extract and log candidate details from metadata (parsed once per job context)"""
+    cached = getattr(ctx, "_parsed_metadata", None)
+    if cached is not None:
+        return cached
+
     metadata = {}
     candidate_details = {}
+    debug = logger.isEnabledFor(logging.DEBUG)
     
-    logger.info("=" * 80)
-    logger.info("🔍 EXTRACTING CANDIDATE DETAILS FROM CONTEXT")
-    logger.info("=" * 80)
+    logger.info("🔍 Extracting candidate details from context")
     
-    # DEBUG: Check what's available in ctx
-    logger.info(f"📋 ctx has 'job' attribute: {hasattr(ctx, 'job')}")
-    if hasattr(ctx, 'job') and ctx.job:
-        logger.info(f"📋 ctx.job exists: {ctx.job is not None}")
-        logger.info(f"📋 ctx.job has 'metadata' attribute: {hasattr(ctx.job, 'metadata')}")
-        if hasattr(ctx.job, 'metadata'):
-            logger.info(f"📋 ctx.job.metadata type: {type(ctx.job.metadata)}")
-            logger.info(f"📋 ctx.job.metadata value: {ctx.job.metadata}")
+    # Bind the raw payloads once instead of re-probing ctx with hasattr
+    job = getattr(ctx, 'job', None)
+    raw_job_metadata = getattr(job, 'metadata', None) if job else None
+    raw_room_metadata = ctx.room.metadata
+    if debug:
+        logger.debug("📋 ctx.job.metadata type: %s value: %s", type(raw_job_metadata), raw_job_metadata)
     
     # Try to get metadata from ctx.job.metadata (RoomAgentDispatch metadata)
     try:
-        if hasattr(ctx, 'job') and ctx.job and hasattr(ctx.job, 'metadata') and ctx.job.metadata:
-            logger.info("✅ Found ctx.job.metadata - attempting to parse...")
-            metadata = json.loads(ctx.job.metadata) if isinstance(ctx.job.metadata, str) else ctx.job.metadata
-            logger.info(f"📦 METADATA FROM ctx.job.metadata:")
-            logger.info(f"   Type: {type(metadata)}")
-            logger.info(f"   Keys: {list(metadata.keys()) if isinstance(metadata, dict) else 'Not a dict'}")
-            logger.info(f"   Full metadata: {json.dumps(metadata, indent=2)}")
+        if raw_job_metadata:
+            metadata = _loads(raw_job_metadata)
+            if debug:
+                logger.debug("📦 METADATA FROM ctx.job.metadata:")
+                logger.debug("   Type: %s", type(metadata))
+                logger.debug("   Keys: %s", list(metadata.keys()) if isinstance(metadata, dict) else 'Not a dict')
+                logger.debug("   Full metadata: %s", orjson.dumps(metadata, option=orjson.OPT_INDENT_2).decode())
             
             candidate_details = metadata.get("candidateDetails", {})
             if candidate_details:
-                logger.info(f"✅ Found candidateDetails in ctx.job.metadata!")
-                logger.info(f"   Keys: {list(candidate_details.keys())}")
+                logger.info("✅ Found candidateDetails in ctx.job.metadata")
+                if debug:
+                    logger.debug("   Keys: %s", list(candidate_details.keys()))
             else:
                 logger.warning("⚠️ candidateDetails key not found in ctx.job.metadata")
-                logger.warning(f"   Available keys: {list(metadata.keys())}")
+                logger.warning("   Available keys: %s", list(metadata.keys()))
         else:
             logger.warning("⚠️ ctx.job.metadata is empty or not accessible")
-    except Exception as e:
-        logger.error(f"❌ Error accessing ctx.job.metadata: {e}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("❌ Error accessing ctx.job.metadata")
 
     # Fallback to room metadata
     if not candidate_details:
         logger.info("🔄 Trying fallback: ctx.room.metadata...")
         try:
-            if ctx.room.metadata:
-                logger.info(f"📋 ctx.room.metadata exists: {ctx.room.metadata}")
-                room_metadata = json.loads(ctx.room.metadata)
-                logger.info(f"📦 METADATA FROM ctx.room.metadata: {json.dumps(room_metadata, indent=2)}")
+            if raw_room_metadata and metadata and raw_room_metadata == raw_job_metadata:
+                # Same payload as the job metadata we already parsed - nothing new to find
+                logger.warning("⚠️ ctx.room.metadata matches ctx.job.metadata, skipping re-parse")
+            elif raw_room_metadata:
+                room_metadata = _loads(raw_room_metadata)
+                if debug:
+                    logger.debug(
+                        "📦 METADATA FROM ctx.room.metadata: %s",
+                        orjson.dumps(room_metadata, option=orjson.OPT_INDENT_2).decode(),
+                    )
                 candidate_details = room_metadata.get("candidateDetails", {})
                 metadata = room_metadata
                 if candidate_details:
-                    logger.info("✅ Found candidateDetails in ctx.room.metadata!")
+                    logger.info("✅ Found candidateDetails in ctx.room.metadata")
             else:
                 logger.warning("⚠️ ctx.room.metadata is empty")
-        except Exception as e:
-            logger.error(f"❌ Error accessing ctx.room.metadata: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception("❌ Error accessing ctx.room.metadata")
     
     
     # Handle nested candidateDetails
     if not candidate_details and "details" in metadata:
         candidate_details = metadata["details"]
 
+    try:
+        ctx._parsed_metadata = (metadata, candidate_details)
+    except AttributeError:
+        pass  # ctx doesn't accept new attributes; just don't memoize
     return metadata, candidate_details
 
 
+# Accepted spellings for each candidate field, in priority order
+_CANDIDATE_KEY_ALIASES = {
+    "candidate_name": ("candidateName", "candidate_name"),
+    "candidate_email": ("candidateEmail", "candidate_email"),
+    "job_title": ("jobTitle", "job_title"),
+    "candidate_skills": ("candidateSkills", "candidate_skills"),
+    "candidate_summary": ("candidateSummary", "candidate_summary"),
+    "projects": ("candidateProjects", "projects"),
+    "resume_analysis": ("resumeAnalysis", "resume_analysis"),
+    "agent_prompt": ("agentPrompt", "agent_prompt", "agentTemplate", "agent_template"),
+}
+
+
+def _pick(mapping: dict, *keys, default=None):
+    """Return the first truthy value found under any of the given keys"""
+    for key in keys:
+        value = mapping.get(key)
+        if value:
+            return value
+    return default
+
+
+def _normalize(text) -> Optional[str]:
+    """Strip an utterance once; None when there is nothing to record"""
+    return (text.strip() or None) if text else None
+
+
+def _normalize_skills(skills, limit: int = 5, default: str = "General technical skills") -> str:
+    """Render candidateSkills (str or list) as a comma-separated string"""
+    if not skills:
+        return default
+    if isinstance(skills, str):
+        return skills
+    if isinstance(skills, (list, tuple)):
+        return ", ".join(map(str, skills[:limit])) or default
+    return default
+
+
+_DEFAULT_AGENT_TEMPLATE = "You are a professional AI interviewer conducting a job interview."
+
+
+@dataclass(slots=True)
+class CandidateFields:
+    """Candidate/job fields resolved once per job from the dispatch metadata"""
+    name: str
+    email: str
+    job_title: str
+    skills: str
+    experience: str
+    summary: str
+    projects: list
+    resume_analysis: dict
+    agent_template: str
+    prompt_source: str
+    candidate_id: str
+    job_id: str
+    company_id: Optional[str]
+    invitation_id: Optional[str]
+
+    @classmethod
+    def from_metadata(cls, metadata: dict, candidate_details: dict) -> "CandidateFields":
+        """Run every alias/fallback chain exactly once"""
+        picked = {name: _pick(candidate_details, *keys) for name, keys in _CANDIDATE_KEY_ALIASES.items()}
+        # agentPrompt is canonical; the aliases cover dispatches from older backends
+        metadata_prompt = _pick(metadata, "agentPrompt", "agentTemplate", "agent_template")
+        return cls(
+            name=str(picked["candidate_name"] or metadata.get("candidateName") or "Candidate"),
+            email=picked["candidate_email"] or "",
+            job_title=str(
+                picked["job_title"]
+                or metadata.get("jobTitle")
+                or metadata.get("jobDetails", {}).get("job_title")
+                or "Position"
+            ),
+            skills=_normalize_skills(picked["candidate_skills"]),
+            experience=str(candidate_details.get("experience", "Not specified")),
+            summary=str(picked["candidate_summary"] or ""),
+            projects=picked["projects"] or [],
+            resume_analysis=picked["resume_analysis"] or {},
+            agent_template=str(metadata_prompt or picked["agent_prompt"] or _DEFAULT_AGENT_TEMPLATE),
+            prompt_source="metadata" if metadata_prompt else ("candidate" if picked["agent_prompt"] else "default"),
+            candidate_id=metadata.get("candidateId") or candidate_details.get("candidate_email", ""),
+            job_id=_pick(metadata, "jobId", "job_id") or candidate_details.get("job_id", ""),
+            company_id=_pick(metadata, "companyId", "company_id"),
+            invitation_id=_pick(metadata, "invitationId", "invitation_id"),
+        )
+
+
+# ========================== SYSTEM PROMPT ==========================
+_PROMPT_TEMPLATE = """{agent_template}
+
+CANDIDATE INFORMATION:
+- Name: {candidate_name}
+- Position Applied: {job_title}
+- Key Skills: {skills}
+- Experience: {experience}{optional_lines}
+
+INTERVIEW GUIDELINES:
+1. Conduct a thorough, professional interview.
+2. Ask about background, skills, and experience in detail.
+3. Use candidate's actual data above to personalize questions.
+4. Always greet by name and reference their job title.
+"""
+
+
+class _KeepPlaceholders(dict):
+    """format_map() mapping that leaves unknown {fields} in place for a later pass"""
+    def __missing__(self, key):
+        return "{" + key + "}"
+
+
+def _escape_braces(value: str) -> str:
+    return value.replace("{", "{{").replace("}", "}}")
+
+
+@functools.lru_cache(maxsize=128)
+def _prompt_shell(agent_template: str, job_title: str) -> str:
+    """Pre-render the job-scoped part of the prompt; candidate fields stay as placeholders"""
+    return _PROMPT_TEMPLATE.format_map(_KeepPlaceholders(
+        agent_template=_escape_braces(agent_template),
+        job_title=_escape_braces(job_title),
+    ))
+
+
+@functools.lru_cache(maxsize=256)
+def _build_system_prompt(
+    agent_template: str,
+    candidate_name: str,
+    job_title: str,
+    skills: str,
+    experience: str,
+    projects_json: str,
+    resume_json: str,
+    candidate_summary: str,
+) -> str:
+    """Render the interviewer system prompt (memoized for re-dispatched jobs)"""
+    # Empty sections are dropped entirely rather than leaving blank lines
+    optional_lines = "".join((
+        f"\n- Projects: {projects_json}..." if projects_json else "",
+        f"\n- Resume Summary: {candidate_summary[:300]}..." if candidate_summary else "",
+        f"\n- Resume Analysis: {resume_json}..." if resume_json else "",
+    ))
+    return _prompt_shell(agent_template, job_title).format_map({
+        "candidate_name": candidate_name,
+        "skills": skills,
+        "experience": experience,
+        "optional_lines": optional_lines,
+    })
+
+
 # ========================== INTERVIEW STATE ==========================
-@dataclass
+@dataclass(slots=True)
+class InterviewResponse:
+    """One evaluated question/answer turn"""
+    question: str
+    answer: str
+    evaluation: dict
+    timestamp: str
+
+
+@dataclass(slots=True)
 class InterviewData:
-    """Interview data storage with Pydantic compatibility"""
-    class Config:
-        protected_namespaces = ()  # Fix Pydantic warning
-    
+    """Per-session interview state (AgentSession userdata)"""
     candidate_id: Optional[str] = None
     job_id: Optional[str] = None
     candidate_name: Optional[str] = None
     candidate_email: Optional[str] = None
     interview_started: bool = False
-    start_time: Optional[datetime] = None
-    responses: List[dict] = field(default_factory=list)
+    start_time: Optional[datetime] = None  # Wall clock, for display/reporting
+    start_monotonic: float = 0.0  # time.monotonic() reference for elapsed math
+    responses: List[InterviewResponse] = field(default_factory=list)
     
     # Performance tracking
     evaluator: Optional[AnswerEvaluator] = None
@@ -133,11 +351,18 @@ class InterviewData:
 class InterviewAgent(Agent):
     """Main Interview Agent with natural conversation flow and performance tracking"""
 
+    # Chat role -> transcript-buffer method
+    _ROLE_DISPATCH = {
+        "user": "on_user_transcript",
+        "assistant": "on_agent_speech",
+        "agent": "on_agent_speech",
+    }
+
     def __init__(self, system_prompt: str):
         logger.info("=" * 60)
         logger.info("🤖 InterviewAgent.__init__ called:")
-        logger.info(f"   System prompt length: {len(system_prompt)} chars")
-        logger.info(f"   System prompt preview: {system_prompt[:200]}...")
+        logger.info("   System prompt length: %s chars", len(system_prompt))
+        logger.info("   System prompt preview: %.200s...", system_prompt)
         logger.info("=" * 60)
         
         super().__init__(
@@ -146,10 +371,14 @@ class InterviewAgent(Agent):
         
         logger.info("✅ Agent initialized with instructions")
         self.greeting_sent = False
+        self._greet_lock = asyncio.Lock()
+        self._pending_evals: set[asyncio.Task] = set()
         self.question_count = 0
         self.conversation_active = True
         self.last_question = None
         self.waiting_for_answer = False
+        self._last_answer_hash = None
+        self._last_answer_ts = 0.0
 
     async def on_enter(self) -> None:
         """Called when agent enters conversation"""
@@ -160,6 +389,7 @@ class InterviewAgent(Agent):
         if not interview_data.interview_started:
             interview_data.interview_started = True
             interview_data.start_time = datetime.now()
+            interview_data.start_monotonic = time.monotonic()
             
             # Initialize evaluator and tracker
             interview_data.evaluator = AnswerEvaluator()
@@ -170,45 +400,61 @@ class InterviewAgent(Agent):
             # Set up transcript listeners for evaluation
             self._setup_transcript_listeners()
 
-            await asyncio.sleep(0.2)
+            if GREETING_DELAY_S > 0:
+                await asyncio.sleep(GREETING_DELAY_S)
             await self.greet_candidate()
     
+    def _transcript_room(self) -> Optional[str]:
+        """Room name the transcript buffer is keyed by"""
+        room = self.session.userdata.room_instance
+        return room.name if room else None
+    
     def _setup_transcript_listeners(self):
         """Set up listeners for user and agent transcripts"""
         # This will be handled in the session setup
         pass
     
     async def on_user_transcript(self, text: str):
-        """Handle user transcript - add to buffer"""
+        """Handle user transcript (already normalized) - add to buffer"""
         try:
-            if text and text.strip():
-                add_message("candidate", text)
-                print("🟢 USER:", text)
+            if text:
+                add_message("candidate", text, room_id=self._transcript_room())
+                logger.info("🟢 USER: %s", text)
         except Exception as e:
-            logger.error(f"❌ Error in on_user_transcript: {e}")
+            logger.error("❌ Error in on_user_transcript: %s", e)
     
     async def on_agent_speech(self, text: str):
-        """Handle agent speech - add to buffer"""
+        """Handle agent speech (already normalized) - add to buffer"""
         try:
-            if text and text.strip():
-                add_message("agent", text)
-                logger.info(f"💬 AGENT SPEECH ADDED: {text[:100]}...")
-                print("🔵 AGENT:", text)
-        except Exception as e:
-            logger.error(f"❌ Error in on_agent_speech: {e}")
-            import traceback
-            traceback.print_exc()
+            if text:
+                add_message("agent", text, room_id=self._transcript_room())
+                logger.info("🔵 AGENT: %s", text)
+        except Exception:
+            logger.exception("❌ Error in on_agent_speech")
     
     async def _handle_user_answer(self, answer: str):
         """Handle user's answer and evaluate it"""
         try:
-            if not answer or not answer.strip():
+            answer = _normalize(answer)
+            if not answer:
+                return
+            # Single-character noise only counts when a question is pending
+            if len(answer) < 2 and not self.waiting_for_answer:
                 return
+            
+            # Debounce duplicate finals so each answer is evaluated once
+            answer_hash = hash(answer)
+            now = time.monotonic()
+            if answer_hash == self._last_answer_hash and now - self._last_answer_ts < DUPLICATE_ANSWER_WINDOW_S:
+                logger.debug("⏭️ Skipping duplicate transcript: %.100s", answer)
+                return
+            self._last_answer_hash = answer_hash
+            self._last_answer_ts = now
+            self.waiting_for_answer = False
                 
             interview_data = self.session.userdata
             
-            answer = answer.strip()
-            logger.info(f"📝 User answered: {answer[:100]}...")
+            logger.info("📝 User answered: %.100s...", answer)
             
             # Add to transcript buffer with print (this calls global add_message)
             await self.on_user_transcript(answer)
@@ -217,127 +463,139 @@ class InterviewAgent(Agent):
             if interview_data.tracker:
                 interview_data.tracker.add_answer(answer)
             
-            # If we have a recent question, evaluate the answer
+            # Evaluate in the background - analytics must not hold up the next turn
             if self.last_question and interview_data.evaluator:
-                logger.info(f"🔍 Evaluating answer to: {self.last_question[:100]}...")
-                
-                # Perform evaluation
-                evaluation = await interview_data.evaluator.evaluate_answer(
-                    question=self.last_question,
-                    answer=answer,
-                    expected_keywords=None,
-                    difficulty_level="medium",
-                    context=f"Candidate: {interview_data.candidate_name}"
+                task = asyncio.create_task(
+                    self._evaluate_and_broadcast(self.last_question, answer, self.question_count)
                 )
+                self._pending_evals.add(task)
+                task.add_done_callback(self._pending_evals.discard)
+            else:
+                logger.warning("⚠️ No question to evaluate against. Last question: %s", self.last_question)
                 
-                # Send evaluation to frontend via LiveKit data channel
-                if interview_data.room_instance:
-                    await LiveKitMessageSender.send_answer_evaluation(
-                        room=interview_data.room_instance,
+        except Exception:
+            logger.exception("❌ Error handling user answer")
+    
+    async def _evaluate_and_broadcast(self, question: str, answer: str, question_number: int):
+        """Evaluate an answer, record it and push the results to the frontend"""
+        try:
+            interview_data = self.session.userdata
+            logger.info("🔍 Evaluating answer to: %.100s...", question)
+            
+            # Perform evaluation
+            evaluation = await interview_data.evaluator.evaluate_answer(
+                question=question,
+                answer=answer,
+                expected_keywords=None,
+                difficulty_level="medium",
+                context=f"Candidate: {interview_data.candidate_name}"
+            )
+            
+            # Store response with evaluation
+            interview_data.responses.append(InterviewResponse(
+                question=question,
+                answer=answer,
+                evaluation=evaluation,
+                timestamp=datetime.now().isoformat()
+            ))
+            
+            # Send evaluation, quick analysis and stats to frontend
+            if interview_data.room_instance:
+                room = interview_data.room_instance
+                current_stats = interview_data.tracker.get_current_stats()
+                if BUNDLE_TURN_UPDATES:
+                    await LiveKitMessageSender.send_turn_update(
+                        room=room,
                         evaluation=evaluation,
-                        question_number=self.question_count
+                        current_stats=current_stats,
+                        question_number=question_number
                     )
-                    
-                    # Also send quick response analysis
-                    await LiveKitMessageSender.send_response_analysis(
-                        room=interview_data.room_instance,
-                        analysis={
-                            "is_correct": evaluation.get("is_correct", False),
-                            "is_partial": evaluation.get("is_partial", False),
-                            "score": evaluation.get("score", 0),
-                            "feedback": evaluation.get("feedback", "")
-                        }
-                    )
-                    
-                    # Send performance update
-                    current_stats = interview_data.tracker.get_current_stats()
-                    await LiveKitMessageSender.send_performance_update(
-                        room=interview_data.room_instance,
-                        current_stats=current_stats
+                else:
+                    analysis = {
+                        "is_correct": evaluation.get("is_correct", False),
+                        "is_partial": evaluation.get("is_partial", False),
+                        "score": evaluation.get("score", 0),
+                        "feedback": evaluation.get("feedback", "")
+                    }
+                    await asyncio.gather(
+                        LiveKitMessageSender.send_answer_evaluation(
+                            room=room,
+                            evaluation=evaluation,
+                            question_number=question_number
+                        ),
+                        LiveKitMessageSender.send_response_analysis(room=room, analysis=analysis),
+                        LiveKitMessageSender.send_performance_update(room=room, current_stats=current_stats),
                     )
-                
-                logger.info(f"✅ Evaluation sent - Score: {evaluation.get('score', 0)}/10")
-                logger.info(f"   Correct: {evaluation.get('is_correct', False)}")
-                logger.info(f"   Feedback: {evaluation.get('feedback', '')[:100]}...")
-                
-                # Store response with evaluation
-                interview_data.responses.append({
-                    "question": self.last_question,
-                    "answer": answer,
-                    "evaluation": evaluation,
-                    "timestamp": datetime.now().isoformat()
-                })
-            else:
-                logger.warning(f"⚠️ No question to evaluate against. Last question: {self.last_question}")
-                
-        except Exception as e:
-            logger.error(f"❌ Error handling user answer: {e}")
-            import traceback
-            traceback.print_exc()
+            
+            logger.info(
+                "✅ Evaluation sent - Score: %s/10, Correct: %s, Feedback: %.100s...",
+                evaluation.get('score', 0),
+                evaluation.get('is_correct', False),
+                evaluation.get('feedback', ''),
+            )
+        except Exception:
+            logger.exception("❌ Error evaluating answer")
+    
+    async def drain_evaluations(self):
+        """Wait for in-flight answer evaluations so final analytics include them"""
+        if self._pending_evals:
+            logger.info("⏳ Waiting for %d pending evaluation(s)...", len(self._pending_evals))
+            await asyncio.gather(*self._pending_evals, return_exceptions=True)
     
     async def _handle_agent_question(self, question: str):
         """Handle agent's question or statement"""
         try:
-            if not question or not question.strip():
+            question = _normalize(question)
+            if not question:
                 return
                 
             interview_data = self.session.userdata
             
             # Add to transcript buffer with print (this calls global add_message)
-            await self.on_agent_speech(question.strip())
+            await self.on_agent_speech(question)
             
             # Simple heuristic: if message ends with '?' it's likely a question
-            if question.strip().endswith('?'):
-                self.last_question = question.strip()
+            if question.endswith('?'):
+                self.last_question = question
                 self.question_count += 1
                 self.waiting_for_answer = True
                 
-                logger.info(f"❓ Question #{self.question_count} asked: {question[:100]}...")
+                logger.info("❓ Question #%s asked: %.100s...", self.question_count, question)
                 
                 # Track the question
                 if interview_data.tracker:
-                    question_num = interview_data.tracker.add_question(question.strip())
+                    question_num = interview_data.tracker.add_question(question)
                     
                     # Notify frontend
                     if interview_data.room_instance:
                         await LiveKitMessageSender.send_question_asked(
                             room=interview_data.room_instance,
-                            question=question.strip(),
+                            question=question,
                             question_number=question_num
                         )
             
-        except Exception as e:
-            logger.error(f"❌ Error handling agent question: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception("❌ Error handling agent question")
     
     async def on_user_message(self, message: agents.ChatMessage) -> None:
         """Called when user sends a chat message - also evaluate"""
         try:
-            if message.message:
-                text = message.message.strip()
-                logger.info(f"💬 User message: {text[:100]}...")
-                # Add to transcript buffer
-                await self.on_user_transcript(text)
+            text = _normalize(message.message)
+            if text:
+                logger.info("💬 User message: %.100s...", text)
                 await self._handle_user_answer(text)
-        except Exception as e:
-            logger.error(f"❌ Error in user message handler: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception("❌ Error in user message handler")
     
     async def on_agent_message(self, message: agents.ChatMessage) -> None:
         """Called when agent sends a chat message - track if it's a question"""
         try:
-            if message.message:
-                text = message.message.strip()
-                logger.info(f"💬 Agent chat message: {text[:100]}...")
-                # Add to transcript buffer
-                await self.on_agent_speech(text)
+            text = _normalize(message.message)
+            if text:
+                logger.info("💬 Agent chat message: %.100s...", text)
                 await self._handle_agent_question(text)
-        except Exception as e:
-            logger.error(f"❌ Error in agent message handler: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception("❌ Error in agent message handler")
     
     async def on_speech_committed(self, evt: agents.SpeechCreatedEvent) -> None:
         """Called when agent speech is committed - capture the text"""
@@ -351,39 +609,37 @@ class InterviewAgent(Agent):
                     text = evt.transcript.text.strip()
             
             if text:
-                logger.info(f"🎤 Agent speech committed: {text[:100]}...")
-                # Add to transcript buffer
-                await self.on_agent_speech(text)
+                logger.info("🎤 Agent speech committed: %.100s...", text)
                 await self._handle_agent_question(text)
         except Exception as e:
-            logger.debug(f"⚠️ Error in speech committed handler: {e}")
+            logger.debug("⚠️ Error in speech committed handler: %s", e)
 
     async def greet_candidate(self):
         """Greet candidate and start interview with personalized greeting"""
-        if self.greeting_sent:
-            return
+        # Exactly-once: concurrent callers wait for the first greeting instead of racing it
+        async with self._greet_lock:
+            if self.greeting_sent:
+                return
 
-        self.greeting_sent = True
+            self.greeting_sent = True
 
-        try:
-            interview_data = self.session.userdata
-            candidate_name = interview_data.candidate_name or "there"
+            try:
+                interview_data = self.session.userdata
+                candidate_name = interview_data.candidate_name or "there"
 
-            logger.info(f"👋 Greeting candidate: {candidate_name}")
+                logger.info("👋 Greeting candidate: %s", candidate_name)
 
-            # Generate greeting
-            await self.session.generate_reply(
-                instructions="Greet the user and offer your assistance."
-            )
-            
-            # Note: The actual greeting text will be captured via on_agent_message
-            # or transcript events, so we don't need to manually add it here
-            
-            logger.info("✅ Conversation started - agent will continue after each response")
-        except Exception as e:
-            logger.error(f"❌ Error starting conversation: {e}")
-            import traceback
-            traceback.print_exc()
+                # Generate greeting
+                await self.session.generate_reply(
+                    instructions="Greet the user and offer your assistance."
+                )
+                
+                # Note: The actual greeting text will be captured via on_agent_message
+                # or transcript events, so we don't need to manually add it here
+                
+                logger.info("✅ Conversation started - agent will continue after each response")
+            except Exception:
+                logger.exception("❌ Error starting conversation")
     
     async def end_interview(self):
         """End interview and send final analytics"""
@@ -395,151 +651,113 @@ class InterviewAgent(Agent):
                 return
             
             logger.info("🏁 Ending interview and calculating final performance...")
+            await self.drain_evaluations()
             
             # Calculate overall performance
             performance = interview_data.evaluator.calculate_overall_performance()
             
-            # Get transcript
-            transcript = interview_data.tracker.get_transcript() if interview_data.tracker else []
+            # Get transcript (already serialized entry by entry as it was recorded)
+            transcript_json = interview_data.tracker.get_transcript_json() if interview_data.tracker else None
             
             # Send to frontend
             if interview_data.room_instance:
                 await LiveKitMessageSender.send_interview_complete(
                     room=interview_data.room_instance,
                     performance=performance,
-                    transcript=transcript
+                    transcript_json=transcript_json
                 )
             
             logger.info("=" * 80)
             logger.info("✅ INTERVIEW COMPLETED")
-            logger.info(f"   Total Score: {performance.get('total_score', 0)}%")
-            logger.info(f"   Questions: {performance.get('total_questions', 0)}")
-            logger.info(f"   Correct: {performance.get('correct_answers', 0)}")
-            logger.info(f"   Recommendation: {performance.get('recommendation', 'N/A')}")
+            logger.info("   Total Score: %s%%", performance.get('total_score', 0))
+            logger.info("   Questions: %s", performance.get('total_questions', 0))
+            logger.info("   Correct: %s", performance.get('correct_answers', 0))
+            logger.info("   Recommendation: %s", performance.get('recommendation', 'N/A'))
             logger.info("=" * 80)
             
-        except Exception as e:
-            logger.error(f"❌ Error ending interview: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception("❌ Error ending interview")
 
 
 # ========================== AGENT WORKER ==========================
+def prewarm(proc: agents.JobProcess):
+    """Load models once per worker process so every job can reuse them"""
+    proc.userdata["vad"] = silero.VAD.load()
+    logger.info("✅ Silero VAD preloaded for worker process")
+    # Modules and model weights live for the whole process; move them out of the
+    # collector's generations so later GC passes don't keep rescanning them
+    gc.collect()
+    gc.freeze()
+    logger.debug("🧊 Froze %s startup objects out of GC", gc.get_freeze_count())
+
+
 # ✅ CRITICAL FIX: Define entrypoint function first (will be passed to WorkerOptions)
 async def entrypoint(ctx: agents.JobContext):
     """Agent entry point - handles RTC sessions"""
-    logger.info("=" * 60)
-    logger.info(f"🚀 AGENT ENTRY - Room: {ctx.room.name}")
-    logger.info(f"📋 Room Metadata: {ctx.room.metadata}")
-    logger.info(f"🔍 Job ID: {ctx.job.id if hasattr(ctx, 'job') and ctx.job else 'N/A'}")
-    logger.info("=" * 60)
-    
     # Extract candidate details
     metadata, candidate_details = extract_candidate_details(ctx)
-    
-    # Extract candidate information with fallbacks
-    candidate_name = (
-        candidate_details.get("candidateName")
-        or candidate_details.get("candidate_name")
-        or metadata.get("candidateName")
-        or "Candidate"
-    )
-
-    job_title = (
-        candidate_details.get("jobTitle")
-        or candidate_details.get("job_title")
-        or metadata.get("jobTitle")
-        or metadata.get("jobDetails", {}).get("job_title")
-        or "Position"
-    )
-
-    # Handle candidateSkills properly (string/list)
-    candidate_skills = (
-        candidate_details.get("candidateSkills")
-        or candidate_details.get("candidate_skills")
-        or []
-    )
-    if isinstance(candidate_skills, str):
-        candidate_skills = [candidate_skills]
-    skills_str = ", ".join(candidate_skills[:5]) if candidate_skills else "General technical skills"
-
-    experience = candidate_details.get("experience", "Not specified")
-    candidate_summary = (
-        candidate_details.get("candidateSummary")
-        or candidate_details.get("candidate_summary")
-        or ""
-    )
-    projects = candidate_details.get("candidateProjects") or candidate_details.get("projects", [])
-    resume_analysis = (
-        candidate_details.get("resumeAnalysis")
-        or candidate_details.get("resume_analysis")
-        or {}
-    )
+    if not metadata and not candidate_details:
+        # Malformed dispatch: don't load VAD or open STT/LLM/TTS streams for it
+        logger.error("❌ No job/room metadata for room %s - aborting job", ctx.room.name)
+        return
 
-    # Get agent prompt
-    agent_template = (
-        metadata.get("agentPrompt")
-        or candidate_details.get("agentPrompt")
-        or candidate_details.get("agent_prompt")
-        or "You are a professional AI interviewer conducting a job interview."
-    )
+    # Load VAD in a worker thread while the prompt is built (no-op once prewarm() ran)
+    vad_task = None
+    if "vad" not in ctx.proc.userdata:
+        logger.warning("⚠️ VAD not preloaded, loading in background")
+        vad_task = asyncio.create_task(asyncio.to_thread(silero.VAD.load))
     
-    # Log agent prompt extraction
-    logger.info("=" * 60)
-    logger.info("📋 AGENT PROMPT EXTRACTION:")
-    logger.info(f"   From metadata.agentPrompt: {metadata.get('agentPrompt') is not None}")
-    logger.info(f"   From candidate_details.agentPrompt: {candidate_details.get('agentPrompt') is not None}")
-    logger.info(f"   From candidate_details.agent_prompt: {candidate_details.get('agent_prompt') is not None}")
-    logger.info(f"   Final agent_template length: {len(agent_template)} chars")
-    logger.info(f"   Agent template preview: {agent_template[:200]}...")
-    logger.info("=" * 60)
+    # Resolve candidate information once; everything below reads attributes
+    fields = CandidateFields.from_metadata(metadata, candidate_details)
+    logger.debug("📋 Agent template preview: %.200s...", fields.agent_template)
 
     # Build system prompt
-    system_prompt = f"""{agent_template}
-
-CANDIDATE INFORMATION:
-- Name: {candidate_name}
-- Position Applied: {job_title}
-- Key Skills: {skills_str}
-- Experience: {experience}
-{f'- Projects: {json.dumps(projects[:3], ensure_ascii=False)[:200]}...' if projects else ''}
-{f'- Resume Summary: {candidate_summary[:300]}...' if candidate_summary else ''}
-{f'- Resume Analysis: {json.dumps(resume_analysis, ensure_ascii=False)[:300]}...' if resume_analysis else ''}
-
-INTERVIEW GUIDELINES:
-1. Conduct a thorough, professional interview.
-2. Ask about background, skills, and experience in detail.
-3. Use candidate's actual data above to personalize questions.
-4. Always greet by name and reference their job title.
-"""
+    projects_json = orjson.dumps(fields.projects[:3]).decode()[:200] if fields.projects else ""
+    resume_json = orjson.dumps(fields.resume_analysis).decode()[:300] if fields.resume_analysis else ""
+    system_prompt = _build_system_prompt(
+        fields.agent_template,
+        fields.name,
+        fields.job_title,
+        fields.skills,
+        fields.experience,
+        projects_json,
+        resume_json,
+        fields.summary,
+    )
 
-    # Logging
-    logger.info("=" * 60)
-    logger.info(f"📋 Candidate Name: {candidate_name}")
-    logger.info(f"💼 Job Title: {job_title}")
-    logger.info(f"🛠️ Skills: {skills_str}")
-    logger.info(f"🎯 Agent Template Present: {bool(agent_template)}")
-    logger.info("=" * 60)
+    # One structured record per job instead of a banner block
+    job_ctx = {
+        "room": ctx.room.name,
+        "job_id": getattr(getattr(ctx, "job", None), "id", None),
+        "candidate": fields.name,
+        "job_title": fields.job_title,
+        "skills": fields.skills,
+        "prompt_source": fields.prompt_source,
+        "template_chars": len(fields.agent_template),
+    }
+    logger.info(
+        "🚀 Job start - room=%(room)s job=%(job_id)s candidate=%(candidate)s "
+        "title=%(job_title)s skills=%(skills)s prompt=%(prompt_source)s/%(template_chars)d chars",
+        job_ctx,
+        extra=job_ctx,
+    )
 
     # Initialize interview data
     interview_data = InterviewData(
-        candidate_id=metadata.get("candidateId")
-        or candidate_details.get("candidate_email", ""),
-        job_id=metadata.get("jobId") or candidate_details.get("job_id", ""),
-        candidate_name=candidate_name,
-        candidate_email=candidate_details.get("candidateEmail")
-        or candidate_details.get("candidate_email", ""),
+        candidate_id=fields.candidate_id,
+        job_id=fields.job_id,
+        candidate_name=fields.name,
+        candidate_email=fields.email,
         room_instance=ctx.room  # Store room for data channel messages
     )
     
     # Initialize TranscriptSaver
     try:
-        invitation_id = metadata.get("invitationId") or metadata.get("invitation_id")
+        invitation_id = fields.invitation_id
         # Generate a fallback UUID if missing (required by backend)
         if not invitation_id:
-            import uuid
-            invitation_id = str(uuid.uuid4())
-            logger.warning(f"⚠️ No invitation_id found, generated fallback: {invitation_id}")
+            invitation_id = uuid.uuid4().hex
+            logger.warning("⚠️ No invitation_id found, generated fallback: %s", invitation_id)
             
         interview_data.transcript_saver = TranscriptSaver(
             invitation_id=invitation_id,
@@ -547,37 +765,29 @@ INTERVIEW GUIDELINES:
             candidate_email=interview_data.candidate_email or "unknown@example.com",
             candidate_name=interview_data.candidate_name or "Unknown Candidate",
             frontend_url=os.getenv("FRONTEND_URL", "http://localhost:3000"),
-            company_id=metadata.get("companyId") or metadata.get("company_id"),
-            job_id=metadata.get("jobId") or metadata.get("job_id")
+            company_id=fields.company_id,
+            job_id=fields.job_id or None
         )
-        logger.info(f"📝 TranscriptSaver initialized for room: {ctx.room.name}")
-    except Exception as e:
-        logger.error(f"❌ Failed to initialize TranscriptSaver: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.info("📝 TranscriptSaver initialized for room: %s", ctx.room.name)
+    except Exception:
+        logger.exception("❌ Failed to initialize TranscriptSaver")
 
     # Create session with new API
-    logger.info("🚀 Creating agent session...")
     try:
+        if vad_task is not None:
+            ctx.proc.userdata["vad"] = await vad_task
         session = AgentSession[InterviewData](
             userdata=interview_data,
-            stt="deepgram/nova-2-general",  # Supported by LiveKit Cloud
-            llm="openai/gpt-4o-mini",
-            tts="cartesia/sonic-3:9626c31c-bec5-4cca-baa8-f8ba9e84c8bc",  # Supported by LiveKit Cloud
-            vad=silero.VAD.load(),
+            stt=STT_MODEL,  # Supported by LiveKit Cloud
+            llm=LLM_MODEL,
+            tts=TTS_MODEL,  # Supported by LiveKit Cloud
+            vad=ctx.proc.userdata["vad"],  # Preloaded once per process in prewarm()
+            preemptive_generation=True,  # Start the LLM on the final transcript, before end-of-turn
+            min_endpointing_delay=MIN_ENDPOINTING_DELAY,
         )
-        logger.info("✅ Agent session created")
 
         # Create and start agent
-        logger.info("=" * 60)
-        logger.info("🤖 CREATING INTERVIEW AGENT:")
-        logger.info(f"   System prompt length: {len(system_prompt)} chars")
-        logger.info(f"   System prompt preview: {system_prompt[:300]}...")
-        logger.info("=" * 60)
-        
         agent = InterviewAgent(system_prompt=system_prompt)
-        logger.info("✅ InterviewAgent created with system prompt")
-        logger.info("🚀 Starting agent in room...")
         
         # Enable recording for the session (audio, transcripts, traces, and logs)
         # This ensures recording is enabled even if the interview doesn't start properly
@@ -587,7 +797,13 @@ INTERVIEW GUIDELINES:
             record=True  # Enable recording for entire session
         )
         
-        logger.info("✅ SESSION STARTED - Agent is now in the room")
+        logger.info(
+            "✅ SESSION STARTED - room=%s prompt=%d chars",
+            ctx.room.name,
+            len(system_prompt),
+            extra={"room": ctx.room.name, "prompt_chars": len(system_prompt)},
+        )
+        logger.debug("🤖 System prompt preview: %.300s...", system_prompt)
         
         # ✅ NEW: Add session end callback
         async def on_session_end():
@@ -595,6 +811,8 @@ INTERVIEW GUIDELINES:
             try:
                 logger.info("=" * 80)
                 logger.info("🏁 SESSION ENDING - Saving all data...")
+                if session.userdata.start_monotonic:
+                    logger.info("⏱️ Interview duration: %.1fs", time.monotonic() - session.userdata.start_monotonic)
                 logger.info("=" * 80)
                 
                 interview_data = session.userdata
@@ -606,37 +824,28 @@ INTERVIEW GUIDELINES:
                         messages = session.conversation
                         if hasattr(messages, '__len__') and len(messages) > 0:
                             from transcript_saver import get_buffer_size
-                            buffer_before = get_buffer_size()
+                            buffer_before = get_buffer_size(ctx.room.name)
                             
                             for msg in messages:
                                 try:
-                                    if hasattr(msg, 'role') and hasattr(msg, 'content'):
-                                        text = str(msg.content).strip() if msg.content else ""
-                                        if text:
-                                            if msg.role == 'user':
-                                                await agent.on_user_transcript(text)
-                                            elif msg.role == 'assistant' or msg.role == 'agent':
-                                                await agent.on_agent_speech(text)
-                                    elif hasattr(msg, 'role') and hasattr(msg, 'text'):
-                                        text = str(msg.text).strip() if msg.text else ""
-                                        if text:
-                                            if msg.role == 'user':
-                                                await agent.on_user_transcript(text)
-                                            elif msg.role == 'assistant' or msg.role == 'agent':
-                                                await agent.on_agent_speech(text)
+                                    handler = getattr(agent, InterviewAgent._ROLE_DISPATCH.get(getattr(msg, 'role', None), ""), None)
+                                    raw = msg.content if hasattr(msg, 'content') else getattr(msg, 'text', None)
+                                    text = _normalize(str(raw)) if raw else None
+                                    if handler and text:
+                                        await handler(text)
                                 except Exception as e:
-                                    logger.debug(f"Error capturing final message: {e}")
+                                    logger.debug("Error capturing final message: %s", e)
                             
-                            buffer_after = get_buffer_size()
+                            buffer_after = get_buffer_size(ctx.room.name)
                             if buffer_after > buffer_before:
-                                logger.info(f"✅ Captured {buffer_after - buffer_before} additional messages from conversation history")
+                                logger.info("✅ Captured %s additional messages from conversation history", buffer_after - buffer_before)
                 except Exception as e:
-                    logger.debug(f"Could not capture final messages: {e}")
+                    logger.debug("Could not capture final messages: %s", e)
                 
                 # 1. Save transcript to database
                 if interview_data.transcript_saver:
                     logger.info("💾 Saving transcript to database...")
-                    success = interview_data.transcript_saver.save_transcript()
+                    success = await interview_data.transcript_saver.save_transcript_async()
                     if success:
                         logger.info("✅ Transcript saved successfully")
                     else:
@@ -645,15 +854,16 @@ INTERVIEW GUIDELINES:
                 # 2. Calculate final performance
                 transcript = []
                 if interview_data.evaluator:
+                    await agent.drain_evaluations()
                     performance = interview_data.evaluator.calculate_overall_performance()
                     
                     logger.info("=" * 80)
                     logger.info("📊 FINAL PERFORMANCE:")
-                    logger.info(f"   Total Score: {performance.get('total_score', 0)}%")
-                    logger.info(f"   Questions Asked: {performance.get('total_questions', 0)}")
-                    logger.info(f"   Correct Answers: {performance.get('correct_answers', 0)}")
-                    logger.info(f"   Wrong Answers: {performance.get('wrong_answers', 0)}")
-                    logger.info(f"   Recommendation: {performance.get('recommendation', 'N/A')}")
+                    logger.info("   Total Score: %s%%", performance.get('total_score', 0))
+                    logger.info("   Questions Asked: %s", performance.get('total_questions', 0))
+                    logger.info("   Correct Answers: %s", performance.get('correct_answers', 0))
+                    logger.info("   Wrong Answers: %s", performance.get('wrong_answers', 0))
+                    logger.info("   Recommendation: %s", performance.get('recommendation', 'N/A'))
                     logger.info("=" * 80)
                     
                     # Get transcript
@@ -675,7 +885,7 @@ INTERVIEW GUIDELINES:
                                 else:
                                     # Just try to send - if it fails, we'll catch it
                                     room_connected = True
-                            except:
+                            except Exception:
                                 room_connected = False
                             
                             if room_connected:
@@ -686,9 +896,9 @@ INTERVIEW GUIDELINES:
                                 )
                                 logger.info("✅ Final analytics sent to frontend via LiveKit")
                             else:
-                                logger.warning(f"⚠️ Room not connected, skipping LiveKit message")
+                                logger.warning("⚠️ Room not connected, skipping LiveKit message")
                         except Exception as e:
-                            logger.warning(f"⚠️ Could not send final analytics via LiveKit: {e}")
+                            logger.warning("⚠️ Could not send final analytics via LiveKit: %s", e)
                             # Fallback: Send via backend API which will forward to frontend
                             logger.info("🔄 Attempting to send via backend API as fallback...")
                     
@@ -698,9 +908,9 @@ INTERVIEW GUIDELINES:
                         
                         # Get transcript from buffer if available
                         from transcript_saver import get_transcript as get_transcript_buffer
-                        transcript_from_buffer = get_transcript_buffer()
+                        transcript_from_buffer = get_transcript_buffer(ctx.room.name)
                         if transcript_from_buffer:
-                            logger.info(f"📝 Found {len(transcript_from_buffer)} messages in transcript buffer")
+                            logger.info("📝 Found %s messages in transcript buffer", len(transcript_from_buffer))
                             # Convert to format expected by API
                             transcript = [
                                 {
@@ -724,7 +934,10 @@ INTERVIEW GUIDELINES:
                                     "transcript": transcript,
                                     "start_time": interview_data.start_time.isoformat() if interview_data.start_time else None,
                                     "end_time": datetime.now().isoformat(),
-                                    "responses": interview_data.responses
+                                    "responses": [
+                                        {**asdict(r), "evaluation": AnswerEvaluator.to_json(r.evaluation)}
+                                        for r in interview_data.responses
+                                    ]
                                 },
                                 timeout=10.0
                             )
@@ -732,21 +945,20 @@ INTERVIEW GUIDELINES:
                             if response.status_code == 200:
                                 logger.info("✅ Session report saved to backend (frontend will be notified)")
                             else:
-                                logger.error(f"❌ Backend save failed: {response.status_code} - {response.text}")
+                                logger.error("❌ Backend save failed: %s - %s", response.status_code, response.text)
                                 
-                    except Exception as e:
-                        logger.error(f"❌ Failed to save to backend: {e}")
-                        import traceback
-                        traceback.print_exc()
+                    except Exception:
+                        logger.exception("❌ Failed to save to backend")
                 else:
                     logger.warning("⚠️ No evaluator found, skipping performance calculation")
                     # Still try to get transcript if tracker exists
                     transcript = interview_data.tracker.get_transcript() if interview_data.tracker else []
             
-            except Exception as e:
-                logger.error(f"❌ Error in session end callback: {e}")
-                import traceback
-                traceback.print_exc()
+            except Exception:
+                logger.exception("❌ Error in session end callback")
+            finally:
+                # The worker process may host later jobs; don't keep this room's buffer around
+                clear_buffer(ctx.room.name)
         
         # Register the callback
         try:
@@ -758,27 +970,23 @@ INTERVIEW GUIDELINES:
                 logger.warning("⚠️ ctx.add_shutdown_callback not available, using session cleanup")
                 # We'll rely on the monitor_interview function for cleanup
         except Exception as e:
-            logger.warning(f"⚠️ Could not register shutdown callback: {e}")
+            logger.warning("⚠️ Could not register shutdown callback: %s", e)
         
         # Set up transcript event listeners using session.on()
         @session.on(agents.UserInputTranscribedEvent)
         async def on_user_transcript_event(event: agents.UserInputTranscribedEvent):
             """Handle user transcript events"""
             try:
-                # Capture both final and interim transcripts
-                if event.transcript and event.transcript.text and event.transcript.text.strip():
-                    text = event.transcript.text.strip()
-                    is_final = getattr(event.transcript, 'is_final', True)
-                    logger.info(f"📝 User transcript event received (final={is_final}): {text[:100]}...")
-                    # Add to transcript buffer via agent method
-                    await agent.on_user_transcript(text)
-                    # Only process for evaluation if it's final
-                    if is_final:
-                        await agent._handle_user_answer(text)
-            except Exception as e:
-                logger.error(f"❌ Error in user transcript handler: {e}")
-                import traceback
-                traceback.print_exc()
+                # Interim transcripts are superseded by the final one; only finals are recorded
+                if not event.transcript or not getattr(event.transcript, 'is_final', True):
+                    return
+                text = _normalize(event.transcript.text)
+                if text:
+                    logger.info("📝 User transcript event received: %.100s...", text)
+                    # Buffers the transcript and evaluates it in one pass
+                    await agent._handle_user_answer(text)
+            except Exception:
+                logger.exception("❌ Error in user transcript handler")
         
         # Also listen to agent speech events if available
         try:
@@ -796,92 +1004,30 @@ INTERVIEW GUIDELINES:
                             text = event.transcript.text.strip()
                     
                     if text:
-                        logger.info(f"🤖 Agent speech received: {text[:100]}...")
-                        # Add to transcript buffer via agent method
-                        asyncio.create_task(agent.on_agent_speech(text))
+                        logger.info("🤖 Agent speech received: %.100s...", text)
+                        # Buffers the speech and tracks questions in one pass
                         asyncio.create_task(agent._handle_agent_question(text))
                 except Exception as e:
-                    logger.debug(f"⚠️ Error in agent speech handler (may not be needed): {e}")
+                    logger.debug("⚠️ Error in agent speech handler (may not be needed): %s", e)
         except Exception as e:
-            logger.debug(f"⚠️ SpeechCreatedEvent not available: {e}")
+            logger.debug("⚠️ SpeechCreatedEvent not available: %s", e)
         
         logger.info("✅ Transcript event listeners registered")
         
-        # Monitor conversation history to capture agent messages
-        async def monitor_conversation_history():
-            """Monitor conversation history to capture agent and user messages"""
+        # Agent replies are pushed once each as they are committed; no polling needed.
+        # User turns are already handled by the final-transcript listener above.
+        @session.on("conversation_item_added")
+        def on_conversation_item_added(event):
+            """Capture committed agent messages"""
             try:
-                await asyncio.sleep(3)  # Wait for session to initialize
-                
-                logger.info("📡 Starting conversation history monitoring...")
-                last_message_count = 0
-                processed_messages = set()  # Track processed messages to avoid duplicates
-                
-                while True:
-                    await asyncio.sleep(2)  # Check every 2 seconds
-                    
-                    try:
-                        interview_data = session.userdata
-                        
-                        # Try to access conversation history from session
-                        if hasattr(session, 'conversation') and session.conversation:
-                            messages = session.conversation
-                            current_count = len(messages) if hasattr(messages, '__len__') else 0
-                            
-                            # If new messages, process them
-                            if current_count > last_message_count:
-                                # Get new messages
-                                new_messages = messages[last_message_count:] if hasattr(messages, '__getitem__') else []
-                                
-                                for idx, msg in enumerate(new_messages):
-                                    try:
-                                        # Create unique ID for message to avoid duplicates
-                                        msg_id = f"{last_message_count + idx}_{id(msg)}"
-                                        if msg_id in processed_messages:
-                                            continue
-                                        
-                                        # Check if it's a user or agent message
-                                        if hasattr(msg, 'role') and hasattr(msg, 'content'):
-                                            text = str(msg.content).strip() if msg.content else ""
-                                            if text:
-                                                processed_messages.add(msg_id)
-                                                if msg.role == 'user':
-                                                    logger.info(f"📝 Found user message in history: {text[:100]}...")
-                                                    # Add to transcript buffer
-                                                    await agent.on_user_transcript(text)
-                                                    await agent._handle_user_answer(text)
-                                                elif msg.role == 'assistant' or msg.role == 'agent':
-                                                    logger.info(f"🤖 Found agent message in history: {text[:100]}...")
-                                                    # Add to transcript buffer
-                                                    await agent.on_agent_speech(text)
-                                                    await agent._handle_agent_question(text)
-                                        elif hasattr(msg, 'role') and hasattr(msg, 'text'):
-                                            # Alternative message format
-                                            text = str(msg.text).strip() if msg.text else ""
-                                            if text:
-                                                processed_messages.add(msg_id)
-                                                if msg.role == 'user':
-                                                    logger.info(f"📝 Found user message (alt format): {text[:100]}...")
-                                                    await agent.on_user_transcript(text)
-                                                    await agent._handle_user_answer(text)
-                                                elif msg.role == 'assistant' or msg.role == 'agent':
-                                                    logger.info(f"🤖 Found agent message (alt format): {text[:100]}...")
-                                                    await agent.on_agent_speech(text)
-                                                    await agent._handle_agent_question(text)
-                                    except Exception as e:
-                                        logger.debug(f"Error processing message from history: {e}")
-                                
-                                last_message_count = current_count
-                        
-                    except Exception as e:
-                        # This is expected if conversation history isn't accessible
-                        logger.debug(f"Conversation history check: {e}")
-                        
+                item = getattr(event, "item", None)
+                if item is None or item.role != "assistant":
+                    return
+                text = (getattr(item, "text_content", None) or "").strip()
+                if text:
+                    asyncio.create_task(agent._handle_agent_question(text))
             except Exception as e:
-                logger.debug(f"⚠️ Conversation history monitoring stopped: {e}")
-        
-        # Start conversation history monitoring (as fallback)
-        asyncio.create_task(monitor_conversation_history())
+                logger.debug("Conversation item capture: %s", e)
         
         # Wrap session methods to track agent responses
         try:
@@ -894,33 +1040,31 @@ INTERVIEW GUIDELINES:
                 
                 # Try to get the actual response text from result
                 try:
-                    # Check if result has text/content
-                    response_text = None
-                    if hasattr(result, 'text'):
-                        response_text = result.text
-                    elif hasattr(result, 'content'):
-                        response_text = result.content
-                    elif isinstance(result, str):
-                        response_text = result
+                    # Duck-typed: text, then content, then a bare string
+                    response_text = (
+                        getattr(result, 'text', None)
+                        or getattr(result, 'content', None)
+                        or (result if isinstance(result, str) else None)
+                    )
                     
                     # Also check conversation history for the latest agent message
-                    if not response_text and hasattr(session, 'conversation') and session.conversation:
-                        # Get last message from conversation
-                        try:
-                            last_msg = session.conversation[-1] if len(session.conversation) > 0 else None
-                            if last_msg and hasattr(last_msg, 'content'):
-                                response_text = str(last_msg.content)
-                            elif last_msg and hasattr(last_msg, 'text'):
-                                response_text = str(last_msg.text)
-                        except:
-                            pass
+                    if not response_text:
+                        conversation = getattr(session, 'conversation', None)
+                        if conversation:
+                            try:
+                                last_msg = conversation[-1]
+                                raw = getattr(last_msg, 'content', None) or getattr(last_msg, 'text', None)
+                                if raw:
+                                    response_text = str(raw)
+                            except Exception:
+                                pass
                     
-                    if response_text and response_text.strip():
-                        text = response_text.strip()
-                        logger.info(f"💬 Agent generated response: {text[:100]}...")
+                    text = _normalize(response_text)
+                    if text:
+                        logger.info("💬 Agent generated response: %.100s...", text)
                         await agent._handle_agent_question(text)
                 except Exception as e:
-                    logger.debug(f"Could not extract response text: {e}")
+                    logger.debug("Could not extract response text: %s", e)
                 
                 return result
             
@@ -930,37 +1074,49 @@ INTERVIEW GUIDELINES:
             logger.info("✅ Conversation tracking hooks installed")
             
         except Exception as e:
-            logger.warning(f"⚠️ Could not install conversation hooks: {e}")
+            logger.warning("⚠️ Could not install conversation hooks: %s", e)
         
         # Monitor for interview end (when participant disconnects)
+        # Set when the last remote participant leaves; cleared if someone (re)joins
+        room_empty = asyncio.Event()
+        
+        @ctx.room.on("participant_disconnected")
+        def on_participant_disconnected(participant: rtc.RemoteParticipant):
+            if not ctx.room.remote_participants:
+                room_empty.set()
+        
+        @ctx.room.on("participant_connected")
+        def on_participant_connected(participant: rtc.RemoteParticipant):
+            room_empty.clear()
+        
         async def monitor_interview():
             """Monitor interview and send final analytics when ended"""
             try:
-                # Wait for room to close or all participants to leave
+                # Wait for all participants to leave
                 while True:
-                    await asyncio.sleep(5)
+                    await room_empty.wait()
                     
-                    # Check if any remote participants are still in the room
-                    remote_participants = list(ctx.room.remote_participants.values())
-                    if len(remote_participants) == 0:
+                    # A reconnect may have raced the event; keep waiting if anyone is back
+                    if not ctx.room.remote_participants:
                         logger.info("📡 No more participants in room, ending interview...")
                         # Store interview data before ending
                         try:
                             interview_data = session.userdata
                             if interview_data.evaluator and interview_data.room_instance:
+                                await agent.drain_evaluations()
                                 performance = interview_data.evaluator.calculate_overall_performance()
-                                transcript = interview_data.tracker.get_transcript() if interview_data.tracker else []
+                                transcript_json = interview_data.tracker.get_transcript_json() if interview_data.tracker else None
                                 
                                 await LiveKitMessageSender.send_interview_complete(
                                     room=interview_data.room_instance,
                                     performance=performance,
-                                    transcript=transcript
+                                    transcript_json=transcript_json
                                 )
                                 
                                 # Save final transcript to database
                                 if interview_data.transcript_saver:
                                     logger.info("💾 Saving final transcript to database...")
-                                    success = interview_data.transcript_saver.save_transcript()
+                                    success = await interview_data.transcript_saver.save_transcript_async()
                                     if success:
                                         logger.info("✅ Transcript saved to database successfully")
                                     else:
@@ -968,24 +1124,23 @@ INTERVIEW GUIDELINES:
                                 
                                 logger.info("=" * 80)
                                 logger.info("✅ INTERVIEW COMPLETED")
-                                logger.info(f"   Total Score: {performance.get('total_score', 0)}%")
-                                logger.info(f"   Questions: {performance.get('total_questions', 0)}")
-                                logger.info(f"   Correct: {performance.get('correct_answers', 0)}")
+                                logger.info("   Total Score: %s%%", performance.get('total_score', 0))
+                                logger.info("   Questions: %s", performance.get('total_questions', 0))
+                                logger.info("   Correct: %s", performance.get('correct_answers', 0))
                                 logger.info("=" * 80)
                         except Exception as e:
-                            logger.error(f"❌ Error sending final analytics: {e}")
+                            logger.error("❌ Error sending final analytics: %s", e)
                         break
+                    room_empty.clear()
                         
             except Exception as e:
-                logger.error(f"❌ Error in interview monitor: {e}")
+                logger.error("❌ Error in interview monitor: %s", e)
         
         # Start monitoring in background
         asyncio.create_task(monitor_interview())
         
-    except Exception as e:
-        logger.error(f"❌ Failed to start agent session: {e}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("❌ Failed to start agent session")
         raise
 
 
@@ -998,10 +1153,10 @@ if __name__ == "__main__":
     agent_name = os.getenv("LIVEKIT_AGENT_NAME", "interview")
     
     logger.info("=" * 60)
-    logger.info(f"🤖 Starting Agent: {agent_name}")
-    logger.info(f"📋 LIVEKIT_AGENT_NAME from env: {os.getenv('LIVEKIT_AGENT_NAME')}")
-    logger.info(f"📋 Make sure this matches server's LIVEKIT_AGENT_NAME")
-    logger.info(f"🌐 Waiting for job requests from LiveKit...")
+    logger.info("🤖 Starting Agent: %s", agent_name)
+    logger.info("📋 LIVEKIT_AGENT_NAME from env: %s", os.getenv('LIVEKIT_AGENT_NAME'))
+    logger.info("📋 Make sure this matches server's LIVEKIT_AGENT_NAME")
+    logger.info("🌐 Waiting for job requests from LiveKit...")
     logger.info("=" * 60)
     
     
@@ -1009,14 +1164,13 @@ if __name__ == "__main__":
         # ✅ FIXED: Create WorkerOptions with entrypoint function and agent_name
         opts = WorkerOptions(
             entrypoint_fnc=entrypoint,
+            prewarm_fnc=prewarm,
             agent_name=agent_name
         )
         agents.cli.run_app(opts)
     except KeyboardInterrupt:
         logger.info("🛑 Agent stopped by user")
-    except Exception as e:
-        logger.error(f"❌ Agent failed to start: {e}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("❌ Agent failed to start")
         raise
 
@@ -1,9 +1,15 @@
 # evaluator.py - AI-powered Answer Evaluation Module
 import logging
-import json
-from typing import Dict, List, Optional
+import asyncio
+import hashlib
+import re
+import time
+from collections import OrderedDict, deque
+from typing import Dict, List, Literal, Optional
 from datetime import datetime
 import openai
+from openai import AsyncOpenAI
+from pydantic import BaseModel, ConfigDict, ValidationError
 import os
 from dotenv import load_dotenv
 
@@ -13,12 +19,124 @@ logger = logging.getLogger(__name__)
 # Configure OpenAI
 openai.api_key = os.getenv("OPENAI_API_KEY")
 
+# Word-ish tokens, keeping tech spellings like c++, c#, node.js, .net intact
+_TOKEN_RE = re.compile(r"[a-z0-9_+#.-]+")
+
+# Max number of AI evaluations remembered per evaluator for repeated Q&A pairs
+EVALUATION_CACHE_SIZE = 1024
+
+# Cap on in-flight OpenAI requests per process, to stay under the account's rate limits
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))
+
+# Most recent evaluations kept in evaluation_history; totals live in the running sums
+EVALUATION_HISTORY_SIZE = 512
+
+
+# Static rubric, sent as the system message so every request shares the same prefix
+# (OpenAI caches identical prompt prefixes automatically); only the Q&A goes in the user turn
+_PROMPT_RUBRIC = """**Your Task:**
+Evaluate the candidate's answer in the user message comprehensively and provide a detailed assessment in the following JSON format:
+
+{
+  "is_correct": true/false,
+  "is_partial": true/false,
+  "score": <0-10>,
+  "evaluation": {
+    "accuracy": <0-100>,
+    "completeness": <0-100>,
+    "relevance": <0-100>,
+    "confidence": "high/medium/low"
+  },
+  "feedback": "Brief constructive feedback (2-3 sentences)",
+  "keywords_matched": ["keyword1", "keyword2"],
+  "keywords_missed": ["keyword3"],
+  "strengths": ["strength1", "strength2"],
+  "improvements": ["improvement1", "improvement2"],
+  "technical_depth": <0-100>,
+  "communication_quality": <0-100>
+}
+
+**Evaluation Criteria:**
+1. **Accuracy:** How technically correct is the answer?
+2. **Completeness:** Does it cover all important aspects?
+3. **Relevance:** Is the answer on-topic and focused?
+4. **Technical Depth:** Shows understanding beyond surface level?
+5. **Communication:** Clear, structured, and easy to follow?
+
+**Scoring Guide:**
+- 9-10: Excellent - Comprehensive, accurate, well-explained
+- 7-8: Good - Solid understanding with minor gaps
+- 5-6: Average - Basic understanding, missing details
+- 3-4: Below Average - Significant gaps or misunderstandings
+- 0-2: Poor - Incorrect or off-topic
+
+**Classification:**
+- is_correct: true if score >= 7
+- is_partial: true if score is 5-6
+- is_correct: false if score < 5
+
+Provide ONLY the JSON output, no additional text."""
+
+class _CriteriaScores(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    accuracy: int
+    completeness: int
+    relevance: int
+    confidence: Literal["high", "medium", "low"]
+
+
+class EvaluationSchema(BaseModel):
+    """Shape of one AI evaluation; sent to OpenAI as a strict structured-output schema"""
+    model_config = ConfigDict(extra="forbid")
+
+    is_correct: bool
+    is_partial: bool
+    score: int
+    evaluation: _CriteriaScores
+    feedback: str
+    keywords_matched: List[str]
+    keywords_missed: List[str]
+    strengths: List[str]
+    improvements: List[str]
+    technical_depth: int
+    communication_quality: int
+
+
+# Strict mode makes the API return JSON that always validates against EvaluationSchema
+_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "answer_evaluation",
+        "strict": True,
+        "schema": EvaluationSchema.model_json_schema(),
+    },
+}
+
+_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": (
+        "You are an expert technical interviewer evaluating a candidate's response. "
+        "Always respond with valid JSON only.\n\n" + _PROMPT_RUBRIC
+    )
+}
+
 
 class AnswerEvaluator:
     """Evaluates candidate answers using AI/LLM"""
 
     def __init__(self):
-        self.evaluation_history = []
+        self.evaluation_history: "deque[Dict]" = deque(maxlen=EVALUATION_HISTORY_SIZE)
+        # Running aggregates so calculate_overall_performance() needn't rescan history
+        self._count = 0
+        self._correct = 0
+        self._partial = 0
+        self._score_sum = 0.0
+        self._accuracy_sum = 0.0
+        self._technical_sum = 0.0
+        self._communication_sum = 0.0
+        self._cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
 
     async def evaluate_answer(
         self,
@@ -42,176 +160,222 @@ class AnswerEvaluator:
             Dictionary with evaluation results
         """
         try:
-            logger.info(f"🔍 Evaluating answer for question: {question[:100]}...")
-            
-            # Build evaluation prompt
-            evaluation_prompt = self._build_evaluation_prompt(
-                question=question,
-                answer=answer,
-                expected_keywords=expected_keywords,
-                difficulty_level=difficulty_level,
-                context=context
-            )
+            # Repeated inputs (retries, replays, duplicate transcripts) skip the LLM call
+            cache_key = self._cache_key(question, answer, expected_keywords, difficulty_level, context)
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                self._cache.move_to_end(cache_key)
+                evaluation = {**cached, "timestamp": time.time()}
+                self._record(evaluation)
+                logger.info("♻️ Reusing cached evaluation - Score: %s/10", evaluation.get('score', 0))
+                return evaluation
             
-            # Call OpenAI API
-            response = await self._call_openai(evaluation_prompt)
+            # Identical requests arriving while one is still being scored (client retries,
+            # double submits) share that single LLM call instead of issuing their own
+            pending = self._inflight.get(cache_key)
+            if pending is None:
+                pending = asyncio.ensure_future(self._evaluate_uncached(
+                    question=question,
+                    answer=answer,
+                    expected_keywords=expected_keywords,
+                    difficulty_level=difficulty_level,
+                    context=context
+                ))
+                self._inflight[cache_key] = pending
+                pending.add_done_callback(lambda task: self._forget_inflight(cache_key, task))
+            else:
+                logger.info("🔗 Joining in-flight evaluation for the same answer")
             
-            # Parse and structure the response
-            evaluation = self._parse_evaluation_response(response)
+            # shield: one caller going away must not cancel the call the others are waiting on
+            evaluation = dict(await asyncio.shield(pending))
             
             # Add metadata
             evaluation["question"] = question
             evaluation["answer"] = answer
-            evaluation["timestamp"] = datetime.now().isoformat()
+            evaluation["timestamp"] = time.time()
             evaluation["difficulty_level"] = difficulty_level
             
             # Store in history
-            self.evaluation_history.append(evaluation)
+            self._record(evaluation)
             
-            logger.info(f"✅ Evaluation complete - Score: {evaluation.get('score', 0)}/10")
+            # Remember AI results only; fallback scores should be retried next time
+            if not evaluation.get("fallback"):
+                self._cache[cache_key] = evaluation
+                if len(self._cache) > EVALUATION_CACHE_SIZE:
+                    self._cache.popitem(last=False)
+            
+            logger.info("✅ Evaluation complete - Score: %s/10", evaluation.get('score', 0))
             
             return evaluation
             
         except Exception as e:
-            logger.error(f"❌ Evaluation failed: {e}")
+            logger.error("❌ Evaluation failed: %s", e)
             return self._get_fallback_evaluation(question, answer, expected_keywords)
 
-    def _build_evaluation_prompt(
+    async def _evaluate_uncached(
         self,
         question: str,
         answer: str,
         expected_keywords: Optional[List[str]],
         difficulty_level: str,
         context: Optional[str]
-    ) -> str:
-        """Build detailed evaluation prompt for GPT-4"""
+    ) -> Dict:
+        """Run one LLM evaluation and return the parsed result, without metadata or recording"""
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("🔍 Evaluating answer for question: %s...", question[:100])
         
-        prompt = f"""You are an expert technical interviewer evaluating a candidate's response.
-
-**Interview Question:**
-{question}
-
-**Candidate's Answer:**
-{answer}
-
-**Difficulty Level:** {difficulty_level}
-
-{"**Expected Topics/Keywords:** " + ", ".join(expected_keywords) if expected_keywords else ""}
-
-{"**Job Context:** " + context if context else ""}
+        # Build evaluation prompt
+        evaluation_prompt = self._build_evaluation_prompt(
+            question=question,
+            answer=answer,
+            expected_keywords=expected_keywords,
+            difficulty_level=difficulty_level,
+            context=context
+        )
+        
+        # Call OpenAI API
+        response = await self._call_openai(evaluation_prompt)
+        
+        # Parse and structure the response
+        return self._parse_evaluation_response(response)
 
-**Your Task:**
-Evaluate this answer comprehensively and provide a detailed assessment in the following JSON format:
+    def _forget_inflight(self, cache_key: str, task: asyncio.Future) -> None:
+        """Done-callback: drop a finished evaluation from the in-flight map"""
+        if self._inflight.get(cache_key) is task:
+            del self._inflight[cache_key]
+        # Mark a failure as retrieved even if every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
 
-{{
-  "is_correct": true/false,
-  "is_partial": true/false,
-  "score": <0-10>,
-  "evaluation": {{
-    "accuracy": <0-100>,
-    "completeness": <0-100>,
-    "relevance": <0-100>,
-    "confidence": "high/medium/low"
-  }},
-  "feedback": "Brief constructive feedback (2-3 sentences)",
-  "keywords_matched": ["keyword1", "keyword2"],
-  "keywords_missed": ["keyword3"],
-  "strengths": ["strength1", "strength2"],
-  "improvements": ["improvement1", "improvement2"],
-  "technical_depth": <0-100>,
-  "communication_quality": <0-100>
-}}
+    def _record(self, evaluation: Dict) -> None:
+        """Append to history and fold the evaluation into the running aggregates"""
+        self.evaluation_history.append(evaluation)
+        self._count += 1
+        if evaluation.get("is_correct", False):
+            self._correct += 1
+        if evaluation.get("is_partial", False):
+            self._partial += 1
+        self._score_sum += evaluation.get("score", 0)
+        self._accuracy_sum += evaluation.get("evaluation", {}).get("accuracy", 0)
+        self._technical_sum += evaluation.get("technical_depth", 0)
+        self._communication_sum += evaluation.get("communication_quality", 0)
 
-**Evaluation Criteria:**
-1. **Accuracy:** How technically correct is the answer?
-2. **Completeness:** Does it cover all important aspects?
-3. **Relevance:** Is the answer on-topic and focused?
-4. **Technical Depth:** Shows understanding beyond surface level?
-5. **Communication:** Clear, structured, and easy to follow?
+    @staticmethod
+    def fmt_ts(ts: float) -> str:
+        """Format an evaluation's epoch-seconds timestamp as ISO 8601 (local time)"""
+        return datetime.fromtimestamp(ts).isoformat()
 
-**Scoring Guide:**
-- 9-10: Excellent - Comprehensive, accurate, well-explained
-- 7-8: Good - Solid understanding with minor gaps
-- 5-6: Average - Basic understanding, missing details
-- 3-4: Below Average - Significant gaps or misunderstandings
-- 0-2: Poor - Incorrect or off-topic
+    @staticmethod
+    def to_json(evaluation: Dict) -> Dict:
+        """
+        Copy of an evaluation with its timestamp formatted for serialization.
+        
+        Args:
+            evaluation: Evaluation dictionary from evaluate_answer()
+        
+        Returns:
+            Dict: Same fields, with "timestamp" as an ISO 8601 string
+        """
+        ts = evaluation.get("timestamp")
+        if isinstance(ts, float):
+            return {**evaluation, "timestamp": AnswerEvaluator.fmt_ts(ts)}
+        return evaluation
 
-**Classification:**
-- is_correct: true if score >= 7
-- is_partial: true if score is 5-6
-- is_correct: false if score < 5
+    @staticmethod
+    def _cache_key(
+        question: str,
+        answer: str,
+        expected_keywords: Optional[List[str]],
+        difficulty_level: str,
+        context: Optional[str]
+    ) -> str:
+        """Stable digest of everything that influences an evaluation"""
+        raw = "\x1f".join((
+            difficulty_level,
+            question,
+            answer,
+            "|".join(expected_keywords or []),
+            context or ""
+        ))
+        return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
 
-Provide ONLY the JSON output, no additional text."""
+    async def evaluate_answers_batch(self, items: List[Dict]) -> List[Dict]:
+        """
+        Evaluate several Q&A pairs concurrently
+        
+        Args:
+            items: Dicts with the evaluate_answer keyword arguments
+                   (question, answer and optionally expected_keywords,
+                   difficulty_level, context)
+            
+        Returns:
+            List of evaluation dictionaries, in the same order as items
+        """
+        logger.info("🔍 Evaluating batch of %d answers...", len(items))
+        return list(await asyncio.gather(*(self.evaluate_answer(**item) for item in items)))
 
+    def _build_evaluation_prompt(
+        self,
+        question: str,
+        answer: str,
+        expected_keywords: Optional[List[str]],
+        difficulty_level: str,
+        context: Optional[str]
+    ) -> str:
+        """Build the per-answer user message (the rubric lives in _SYSTEM_MESSAGE)"""
+        
+        prompt = (
+            f"**Interview Question:**\n{question}\n\n"
+            f"**Candidate's Answer:**\n{answer}\n\n"
+            f"**Difficulty Level:** {difficulty_level}"
+        )
+        if expected_keywords:
+            prompt += "\n\n**Expected Topics/Keywords:** " + ", ".join(expected_keywords)
+        if context:
+            prompt += "\n\n**Job Context:** " + context
         return prompt
 
     async def _call_openai(self, prompt: str) -> str:
         """Call OpenAI API for evaluation"""
         try:
-            from openai import AsyncOpenAI
-            
-            client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+            client = _client()
+            if client is None:
+                raise RuntimeError("OPENAI_API_KEY is not set")
             
-            response = await client.chat.completions.create(
-                model="gpt-4o-mini",  # or gpt-4 for better quality
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert technical interviewer. Always respond with valid JSON only."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.3,  # Lower temperature for more consistent evaluation
-                max_tokens=800,
-                response_format={"type": "json_object"}  # Force JSON response
-            )
+            async with _SEMAPHORE:
+                response = await client.chat.completions.create(
+                    model="gpt-4o-mini",  # or gpt-4 for better quality
+                    messages=[
+                        _SYSTEM_MESSAGE,
+                        {
+                            "role": "user",
+                            "content": prompt
+                        }
+                    ],
+                    temperature=0.3,  # Lower temperature for more consistent evaluation
+                    max_tokens=800,
+                    response_format=_RESPONSE_FORMAT
+                )
             
             return response.choices[0].message.content
             
         except Exception as e:
-            logger.error(f"❌ OpenAI API call failed: {e}")
+            logger.error("❌ OpenAI API call failed: %s", e)
             raise
 
     def _parse_evaluation_response(self, response_text: str) -> Dict:
         """Parse and validate OpenAI response"""
         try:
-            evaluation = json.loads(response_text)
-            
-            # Ensure all required fields are present
-            required_fields = {
-                "is_correct": False,
-                "is_partial": False,
-                "score": 0,
-                "evaluation": {
-                    "accuracy": 0,
-                    "completeness": 0,
-                    "relevance": 0,
-                    "confidence": "low"
-                },
-                "feedback": "",
-                "keywords_matched": [],
-                "keywords_missed": [],
-                "strengths": [],
-                "improvements": []
-            }
-            
-            # Merge with defaults
-            for key, default_value in required_fields.items():
-                if key not in evaluation:
-                    evaluation[key] = default_value
-            
-            # Validate score range
-            evaluation["score"] = max(0, min(10, evaluation.get("score", 0)))
-            
-            return evaluation
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"❌ Failed to parse evaluation JSON: {e}")
-            logger.error(f"Response: {response_text}")
+            evaluation = EvaluationSchema.model_validate_json(response_text).model_dump()
+        except ValidationError as e:
+            # Only reachable on a refusal or a reply truncated at max_tokens
+            logger.error("❌ Failed to parse evaluation JSON: %s", e)
+            logger.error("Response: %s", response_text)
             return self._get_fallback_evaluation("", "", [])
+        
+        # The schema can't express numeric bounds under strict mode, so clamp here
+        evaluation["score"] = max(0, min(10, evaluation["score"]))
+        return evaluation
 
     def _get_fallback_evaluation(
         self,
@@ -225,10 +389,19 @@ Provide ONLY the JSON output, no additional text."""
         if not expected_keywords:
             expected_keywords = []
         
-        # Simple keyword matching
+        # Simple keyword matching: tokenize the answer once, then single-word
+        # keywords are set lookups; multi-word phrases fall back to substring search
         answer_lower = answer.lower()
-        matched_keywords = [kw for kw in expected_keywords if kw.lower() in answer_lower]
-        missed_keywords = [kw for kw in expected_keywords if kw.lower() not in answer_lower]
+        answer_tokens = set()
+        for token in _TOKEN_RE.findall(answer_lower):
+            answer_tokens.add(token)
+            answer_tokens.add(token.strip(".-"))  # "python." / "-docker" at sentence edges
+        matched_keywords = []
+        missed_keywords = []
+        for kw in expected_keywords:
+            kw_lower = kw.lower()
+            hit = kw_lower in answer_lower if " " in kw_lower else kw_lower in answer_tokens
+            (matched_keywords if hit else missed_keywords).append(kw)
         
         # Calculate score based on keyword matches
         if expected_keywords:
@@ -258,7 +431,7 @@ Provide ONLY the JSON output, no additional text."""
             "improvements": ["Could provide more detailed explanation"] if not is_correct else [],
             "technical_depth": int(score * 10),
             "communication_quality": 70,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": time.time(),
             "question": question,
             "answer": answer,
             "fallback": True
@@ -266,7 +439,7 @@ Provide ONLY the JSON output, no additional text."""
 
     def calculate_overall_performance(self) -> Dict:
         """Calculate overall interview performance from all evaluations"""
-        if not self.evaluation_history:
+        if not self._count:
             return {
                 "total_score": 0,
                 "correct_answers": 0,
@@ -276,19 +449,18 @@ Provide ONLY the JSON output, no additional text."""
                 "total_questions": 0
             }
         
-        total_questions = len(self.evaluation_history)
-        correct_answers = sum(1 for e in self.evaluation_history if e.get("is_correct", False))
-        partial_answers = sum(1 for e in self.evaluation_history if e.get("is_partial", False))
+        total_questions = self._count
+        correct_answers = self._correct
+        partial_answers = self._partial
         wrong_answers = total_questions - correct_answers - partial_answers
         
         # Calculate average score
-        total_score_sum = sum(e.get("score", 0) for e in self.evaluation_history)
-        average_score = round((total_score_sum / total_questions) * 10, 1) if total_questions > 0 else 0
+        average_score = round((self._score_sum / total_questions) * 10, 1) if total_questions > 0 else 0
         
         # Calculate category averages
-        avg_accuracy = sum(e.get("evaluation", {}).get("accuracy", 0) for e in self.evaluation_history) / total_questions
-        avg_technical = sum(e.get("technical_depth", 0) for e in self.evaluation_history) / total_questions
-        avg_communication = sum(e.get("communication_quality", 0) for e in self.evaluation_history) / total_questions
+        avg_accuracy = self._accuracy_sum / total_questions
+        avg_technical = self._technical_sum / total_questions
+        avg_communication = self._communication_sum / total_questions
         
         # Identify strengths and weaknesses
         strengths = []
@@ -342,6 +514,22 @@ Provide ONLY the JSON output, no additional text."""
         }
 
 
+# Process-wide OpenAI client: one connection pool shared by every evaluator
+_CLIENT: Optional[AsyncOpenAI] = None
+# Shared with the client so the cap holds across evaluator instances
+_SEMAPHORE = asyncio.Semaphore(OPENAI_MAX_CONCURRENCY)
+
+
+def _client() -> Optional[AsyncOpenAI]:
+    """Get the shared OpenAI client, or None if OPENAI_API_KEY is unset"""
+    global _CLIENT
+    if _CLIENT is None:
+        api_key = os.getenv("OPENAI_API_KEY")
+        if api_key:
+            _CLIENT = AsyncOpenAI(api_key=api_key, max_retries=2, timeout=30.0)
+    return _CLIENT
+
+
 # Singleton instance
 _evaluator_instance = None
 
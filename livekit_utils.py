@@ -1,12 +1,157 @@
 # livekit_utils.py - LiveKit Data Channel Utilities
+import asyncio
+import base64
+import gzip
 import logging
-import json
-from typing import Dict, Optional
+import os
+import time
+import weakref
+from array import array
+from collections import deque
+from typing import Dict, List, Optional
 from datetime import datetime
 from livekit import rtc
 
+try:
+    import orjson
+
+    def _dumps(message: Dict) -> bytes:
+        """Serialize a message to UTF-8 JSON bytes (datetimes become ISO 8601 strings)"""
+        return orjson.dumps(message)
+
+    _loads = orjson.loads
+    # Embeds already-serialized JSON in a message (orjson >= 3.9)
+    _Fragment = getattr(orjson, "Fragment", None)
+except ImportError:
+    import json
+
+    def _dumps(message: Dict) -> bytes:
+        """Serialize a message to UTF-8 JSON bytes (datetimes become ISO 8601 strings)"""
+        return json.dumps(message, ensure_ascii=False, default=datetime.isoformat).encode('utf-8')
+
+    _loads = json.loads
+    _Fragment = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
 logger = logging.getLogger(__name__)
 
+# LIVEKIT_DATA_FORMAT=msgpack publishes compact MessagePack frames on BINARY_TOPIC
+# instead of JSON on JSON_TOPIC, for frontends that have migrated to the binary schema
+JSON_TOPIC = "interview-events"
+BINARY_TOPIC = "ie-bin"
+USE_MSGPACK = os.getenv("LIVEKIT_DATA_FORMAT", "json").lower() == "msgpack" and msgpack is not None
+# Topic every message is published on, fixed for the process
+_TOPIC = BINARY_TOPIC if USE_MSGPACK else JSON_TOPIC
+
+# Bound local_participant.publish_data per room, so sends skip the attribute walk
+_publishers: "weakref.WeakKeyDictionary[rtc.Room, object]" = weakref.WeakKeyDictionary()
+
+# Wire schema v1: integer message types and short keys
+_WIRE_VERSION = 1
+_MESSAGE_TYPES = {
+    "answer_evaluation": 1,
+    "response_analysis": 2,
+    "interview_complete": 3,
+    "question_asked": 4,
+    "performance_update": 5,
+    "turn_update": 6,
+    "batch": 7,
+}
+_COMPACT_KEYS = {
+    "evaluation": "ev",
+    "analysis": "an",
+    "performance": "pf",
+    "stats": "st",
+    "items": "it",
+    "transcript": "tr",
+    "timestamp": "ts",
+    "question": "q",
+    "question_number": "qn",
+    "expected_keywords": "ek",
+    "is_correct": "ic",
+    "is_partial": "ip",
+    "score": "sc",
+    "accuracy": "ac",
+    "completeness": "cm",
+    "relevance": "rl",
+    "confidence": "cf",
+    "feedback": "fb",
+    "keywords_matched": "km",
+    "keywords_missed": "kx",
+    "strengths": "sg",
+    "improvements": "im",
+    "weaknesses": "wk",
+    "recommendation": "rc",
+    "total_score": "tsc",
+    "correct_answers": "ca",
+    "wrong_answers": "wa",
+    "partial_answers": "pa",
+    "total_questions": "tq",
+    "technical_score": "tch",
+    "communication_score": "cms",
+    "response_rate": "rr",
+    "confidence_level": "cl",
+    "questions_asked": "qa",
+    "answers_received": "ar",
+    "duration_seconds": "ds",
+}
+
+
+def _to_wire(value):
+    """Map a message to the compact wire schema (unknown keys pass through unchanged)"""
+    if isinstance(value, dict):
+        out = {}
+        for key, item in value.items():
+            if key == "type" and item in _MESSAGE_TYPES:
+                out["v"] = _WIRE_VERSION
+                out["t"] = _MESSAGE_TYPES[item]
+            else:
+                out[_COMPACT_KEYS.get(key, key)] = _to_wire(item)
+        return out
+    if isinstance(value, list):
+        return [_to_wire(item) for item in value]
+    if isinstance(value, datetime) and value.tzinfo is None:
+        # msgpack's timestamp extension needs an aware datetime
+        return value.astimezone()
+    return value
+
+
+def _pack(message: Dict) -> bytes:
+    """Serialize a message as MessagePack in the compact wire schema"""
+    return msgpack.packb(_to_wire(message), use_bin_type=True, datetime=True)
+
+
+def _encode(message: Dict) -> bytes:
+    """Serialize a message in the configured wire format"""
+    return _pack(message) if USE_MSGPACK else _dumps(message)
+
+
+# Transcripts at least this many JSON bytes are sent gzip+base64 encoded in
+# interview_complete ({"enc": "gz+b64", "data": ...}); 0 keeps them plain
+TRANSCRIPT_COMPRESS_BYTES = int(os.getenv("LIVEKIT_TRANSCRIPT_COMPRESS_BYTES", "0"))
+
+# Last formatted timestamp, keyed by monotonic millisecond
+_ts_cache = {"tick": -1, "value": ""}
+
+
+def _now_iso() -> str:
+    """Current local time as ISO 8601, formatted at most once per millisecond"""
+    tick = int(time.monotonic() * 1000)
+    if tick != _ts_cache["tick"]:
+        _ts_cache["tick"] = tick
+        _ts_cache["value"] = datetime.now().isoformat()
+    return _ts_cache["value"]
+
+
+# LIVEKIT_BATCH_MESSAGES=1 coalesces messages sent within BATCH_MAX_DELAY_MS of each
+# other into one {"type": "batch", "items": [...]} packet (see DataChannelBatcher)
+BATCH_MESSAGES = os.getenv("LIVEKIT_BATCH_MESSAGES") == "1"
+BATCH_MAX_DELAY_MS = float(os.getenv("LIVEKIT_BATCH_MAX_DELAY_MS", "20"))
+
 
 class LiveKitMessageSender:
     """Utility class for sending structured messages via LiveKit data channel"""
@@ -29,41 +174,49 @@ class LiveKitMessageSender:
             bool: Success status
         """
         try:
-            message = {
-                "type": "answer_evaluation",
-                "evaluation": {
-                    "is_correct": evaluation.get("is_correct", False),
-                    "is_partial": evaluation.get("is_partial", False),
-                    "score": evaluation.get("score", 0),
-                    "accuracy": evaluation.get("evaluation", {}).get("accuracy", 0),
-                    "completeness": evaluation.get("evaluation", {}).get("completeness", 0),
-                    "relevance": evaluation.get("evaluation", {}).get("relevance", 0),
-                    "confidence": evaluation.get("evaluation", {}).get("confidence", "low"),
-                    "feedback": evaluation.get("feedback", ""),
-                    "keywords_matched": evaluation.get("keywords_matched", []),
-                    "keywords_missed": evaluation.get("keywords_missed", []),
-                    "strengths": evaluation.get("strengths", []),
-                    "improvements": evaluation.get("improvements", [])
-                },
-                "timestamp": datetime.now().isoformat()
-            }
-            
-            if question_number is not None:
-                message["question_number"] = question_number
+            message = LiveKitMessageSender._build_answer_evaluation(evaluation, question_number)
             
-            logger.info(f"📤 Sending answer evaluation via data channel...")
-            logger.info(f"   Score: {evaluation.get('score', 0)}/10")
-            logger.info(f"   Correct: {evaluation.get('is_correct', False)}")
+            logger.debug("📤 Sending answer evaluation via data channel...")
+            logger.info("   Score: %s/10", evaluation.get('score', 0))
+            logger.info("   Correct: %s", evaluation.get('is_correct', False))
             
             await LiveKitMessageSender._send_data_message(room, message)
             
-            logger.info("✅ Answer evaluation sent successfully")
+            logger.debug("✅ Answer evaluation sent successfully")
             return True
             
         except Exception as e:
-            logger.error(f"❌ Failed to send answer evaluation: {e}")
+            logger.error("❌ Failed to send answer evaluation: %s", e)
             return False
 
+    @staticmethod
+    def _build_answer_evaluation(evaluation: Dict, question_number: Optional[int] = None) -> Dict:
+        """Build the answer_evaluation message payload"""
+        get = evaluation.get
+        scores = get("evaluation") or {}
+        message = {
+            "type": "answer_evaluation",
+            "evaluation": {
+                "is_correct": get("is_correct", False),
+                "is_partial": get("is_partial", False),
+                "score": get("score", 0),
+                "accuracy": scores.get("accuracy", 0),
+                "completeness": scores.get("completeness", 0),
+                "relevance": scores.get("relevance", 0),
+                "confidence": scores.get("confidence", "low"),
+                "feedback": get("feedback", ""),
+                "keywords_matched": get("keywords_matched", []),
+                "keywords_missed": get("keywords_missed", []),
+                "strengths": get("strengths", []),
+                "improvements": get("improvements", [])
+            },
+            "timestamp": _now_iso()
+        }
+        
+        if question_number is not None:
+            message["question_number"] = question_number
+        return message
+
     @staticmethod
     async def send_response_analysis(
         room: rtc.Room,
@@ -80,33 +233,40 @@ class LiveKitMessageSender:
             bool: Success status
         """
         try:
-            message = {
-                "type": "response_analysis",
-                "analysis": {
-                    "is_correct": analysis.get("is_correct", False),
-                    "is_partial": analysis.get("is_partial", False),
-                    "score": analysis.get("score", 0),
-                    "feedback": analysis.get("feedback", "")
-                },
-                "timestamp": datetime.now().isoformat()
-            }
+            message = LiveKitMessageSender._build_response_analysis(analysis)
             
-            logger.info(f"📤 Sending response analysis...")
+            logger.debug("📤 Sending response analysis...")
             
             await LiveKitMessageSender._send_data_message(room, message)
             
-            logger.info("✅ Response analysis sent")
+            logger.debug("✅ Response analysis sent")
             return True
             
         except Exception as e:
-            logger.error(f"❌ Failed to send response analysis: {e}")
+            logger.error("❌ Failed to send response analysis: %s", e)
             return False
 
+    @staticmethod
+    def _build_response_analysis(analysis: Dict) -> Dict:
+        """Build the response_analysis message payload"""
+        get = analysis.get
+        return {
+            "type": "response_analysis",
+            "analysis": {
+                "is_correct": get("is_correct", False),
+                "is_partial": get("is_partial", False),
+                "score": get("score", 0),
+                "feedback": get("feedback", "")
+            },
+            "timestamp": _now_iso()
+        }
+
     @staticmethod
     async def send_interview_complete(
         room: rtc.Room,
         performance: Dict,
-        transcript: Optional[list] = None
+        transcript: Optional[list] = None,
+        transcript_json: Optional[bytes] = None
     ) -> bool:
         """
         Send final interview completion data with full analysis
@@ -115,6 +275,8 @@ class LiveKitMessageSender:
             room: LiveKit room instance
             performance: Overall performance dictionary
             transcript: Optional conversation transcript
+            transcript_json: Optional pre-serialized transcript (JSON array bytes,
+                e.g. InterviewTracker.get_transcript_json()); used instead of transcript
             
         Returns:
             bool: Success status
@@ -140,31 +302,80 @@ class LiveKitMessageSender:
                     "response_rate": 0,
                     "confidence_level": 0
                 }),
-                "timestamp": datetime.now().isoformat()
+                "timestamp": _now_iso()
             }
             
-            if transcript:
-                message["transcript"] = transcript
-            
-            logger.info("=" * 80)
-            logger.info("📤 SENDING INTERVIEW COMPLETION DATA")
-            logger.info(f"   Total Score: {performance.get('total_score', 0)}%")
-            logger.info(f"   Correct: {performance.get('correct_answers', 0)}")
-            logger.info(f"   Wrong: {performance.get('wrong_answers', 0)}")
-            logger.info(f"   Partial: {performance.get('partial_answers', 0)}")
-            logger.info(f"   Total Questions: {performance.get('total_questions', 0)}")
-            logger.info(f"   Recommendation: {performance.get('recommendation', 'N/A')}")
-            logger.info("=" * 80)
+            if transcript_json is not None:
+                if transcript_json != b"[]":
+                    message["transcript"] = LiveKitMessageSender._embed_transcript_json(transcript_json)
+            elif transcript:
+                message["transcript"] = LiveKitMessageSender._encode_transcript(transcript)
+            
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("=" * 80)
+                logger.info("📤 SENDING INTERVIEW COMPLETION DATA")
+                logger.info("   Total Score: %s%%", performance.get('total_score', 0))
+                logger.info("   Correct: %s", performance.get('correct_answers', 0))
+                logger.info("   Wrong: %s", performance.get('wrong_answers', 0))
+                logger.info("   Partial: %s", performance.get('partial_answers', 0))
+                logger.info("   Total Questions: %s", performance.get('total_questions', 0))
+                logger.info("   Recommendation: %s", performance.get('recommendation', 'N/A'))
+                logger.info("=" * 80)
             
             await LiveKitMessageSender._send_data_message(room, message)
+            # Last message of the session: don't leave it sitting in a batch window
+            await LiveKitMessageSender.flush(room)
             
             logger.info("✅ Interview completion data sent successfully")
             return True
             
         except Exception as e:
-            logger.error(f"❌ Failed to send interview completion: {e}")
+            logger.error("❌ Failed to send interview completion: %s", e)
             return False
 
+    @staticmethod
+    def _embed_transcript_json(transcript_json: bytes):
+        """
+        Place a pre-serialized transcript in the interview_complete payload
+        
+        Args:
+            transcript_json: Transcript as JSON array bytes
+            
+        Returns:
+            A gz+b64 envelope past TRANSCRIPT_COMPRESS_BYTES, otherwise an orjson
+            Fragment spliced in as-is (parsed back only for msgpack / old orjson)
+        """
+        if TRANSCRIPT_COMPRESS_BYTES and len(transcript_json) >= TRANSCRIPT_COMPRESS_BYTES:
+            packed = gzip.compress(transcript_json, compresslevel=6)
+            logger.debug("🗜️ Transcript compressed %d -> %d bytes", len(transcript_json), len(packed))
+            return {"enc": "gz+b64", "data": base64.b64encode(packed).decode("ascii")}
+        if _Fragment is not None and not USE_MSGPACK:
+            return _Fragment(transcript_json)
+        return _loads(transcript_json)
+
+    @staticmethod
+    def _encode_transcript(transcript: list):
+        """
+        Compress a large transcript for the interview_complete payload
+        
+        Args:
+            transcript: Conversation transcript entries
+            
+        Returns:
+            The transcript unchanged, or {"enc": "gz+b64", "data": str} once its
+            JSON reaches TRANSCRIPT_COMPRESS_BYTES
+        """
+        if not TRANSCRIPT_COMPRESS_BYTES:
+            return transcript
+        
+        raw = _dumps(transcript)
+        if len(raw) < TRANSCRIPT_COMPRESS_BYTES:
+            return transcript
+        
+        packed = gzip.compress(raw, compresslevel=6)
+        logger.debug("🗜️ Transcript compressed %d -> %d bytes", len(raw), len(packed))
+        return {"enc": "gz+b64", "data": base64.b64encode(packed).decode("ascii")}
+
     @staticmethod
     async def send_question_asked(
         room: rtc.Room,
@@ -189,20 +400,20 @@ class LiveKitMessageSender:
                 "type": "question_asked",
                 "question": question,
                 "question_number": question_number,
-                "timestamp": datetime.now().isoformat()
+                "timestamp": _now_iso()
             }
             
             if expected_keywords:
                 message["expected_keywords"] = expected_keywords
             
-            logger.info(f"📤 Sending question notification (#{question_number})...")
+            logger.debug("📤 Sending question notification (#%s)...", question_number)
             
             await LiveKitMessageSender._send_data_message(room, message)
             
             return True
             
         except Exception as e:
-            logger.error(f"❌ Failed to send question notification: {e}")
+            logger.error("❌ Failed to send question notification: %s", e)
             return False
 
     @staticmethod
@@ -221,20 +432,64 @@ class LiveKitMessageSender:
             bool: Success status
         """
         try:
-            message = {
-                "type": "performance_update",
-                "stats": current_stats,
-                "timestamp": datetime.now().isoformat()
-            }
+            message = LiveKitMessageSender._build_performance_update(current_stats)
+            
+            logger.debug("📤 Sending performance update...")
+            
+            await LiveKitMessageSender._send_data_message(room, message)
+            
+            return True
+            
+        except Exception as e:
+            logger.error("❌ Failed to send performance update: %s", e)
+            return False
+
+    @staticmethod
+    def _build_performance_update(current_stats: Dict) -> Dict:
+        """Build the performance_update message payload"""
+        return {
+            "type": "performance_update",
+            "stats": current_stats,
+            "timestamp": _now_iso()
+        }
+
+    @staticmethod
+    async def send_turn_update(
+        room: rtc.Room,
+        evaluation: Dict,
+        current_stats: Dict,
+        question_number: Optional[int] = None
+    ) -> bool:
+        """
+        Send the per-answer evaluation and stats as one composite event
+        
+        The payload is an answer_evaluation message with "type": "turn_update"
+        and a "stats" field added. The response_analysis fields (is_correct,
+        is_partial, score, feedback) are already inside "evaluation", so they
+        are not repeated.
+        
+        Args:
+            room: LiveKit room instance
+            evaluation: Evaluation dictionary from AnswerEvaluator
+            current_stats: Current performance statistics
+            question_number: Optional question number
             
-            logger.info(f"📤 Sending performance update...")
+        Returns:
+            bool: Success status
+        """
+        try:
+            message = LiveKitMessageSender._build_answer_evaluation(evaluation, question_number)
+            message["type"] = "turn_update"
+            message["stats"] = current_stats
+            
+            logger.debug("📤 Sending turn update (score %s/10)...", evaluation.get('score', 0))
             
             await LiveKitMessageSender._send_data_message(room, message)
             
             return True
             
         except Exception as e:
-            logger.error(f"❌ Failed to send performance update: {e}")
+            logger.error("❌ Failed to send turn update: %s", e)
             return False
 
     @staticmethod
@@ -242,38 +497,164 @@ class LiveKitMessageSender:
         """
         Internal method to send data via LiveKit data channel
         
+        With BATCH_MESSAGES on, the message is queued on the room's
+        DataChannelBatcher and coalesced with anything sent right after it.
+        
         Args:
             room: LiveKit room instance
             message: Message dictionary to send
         """
+        if BATCH_MESSAGES:
+            await DataChannelBatcher.for_room(room).enqueue(message)
+            return
+        
+        await LiveKitMessageSender._publish(room, _encode(message))
+        logger.debug("✅ Data message sent: %s", message.get('type', 'unknown'))
+
+    @staticmethod
+    async def flush(room: rtc.Room) -> None:
+        """
+        Publish any messages still waiting in the room's batch window
+        
+        Args:
+            room: LiveKit room instance
+        """
+        if BATCH_MESSAGES:
+            await DataChannelBatcher.for_room(room).flush()
+
+    @staticmethod
+    async def _publish(room: rtc.Room, message_bytes: bytes) -> None:
+        """
+        Publish already-encoded bytes on the data channel
+        
+        Args:
+            room: LiveKit room instance
+            message_bytes: Payload from _encode()
+        """
         try:
-            # Convert message to JSON
-            message_json = json.dumps(message, ensure_ascii=False)
-            message_bytes = message_json.encode('utf-8')
-            
-            # Get local participant
-            local_participant = room.local_participant
-            
-            if not local_participant:
-                logger.error("❌ No local participant found in room")
-                return
+            publish = _publishers.get(room)
+            if publish is None:
+                # Get local participant
+                local_participant = room.local_participant
+                
+                if not local_participant:
+                    logger.error("❌ No local participant found in room")
+                    return
+                publish = _publishers[room] = local_participant.publish_data
             
             # Send to all participants
-            await local_participant.publish_data(
+            await publish(
                 payload=message_bytes,
                 reliable=True,  # Ensure delivery
-                topic="interview-events"  # Optional topic for filtering
+                topic=_TOPIC  # Frontend routes JSON vs binary frames by topic
             )
             
-            logger.debug(f"✅ Data message sent: {message.get('type', 'unknown')}")
-            
-        except Exception as e:
-            logger.error(f"❌ Failed to send data message: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception("❌ Failed to send data message")
             raise
 
 
+class DataChannelBatcher:
+    """
+    Coalesce back-to-back data-channel messages for one room into a single packet
+    
+    Messages are encoded as they arrive and held for up to max_delay_ms. The
+    window is flushed early once it holds max_messages or max_bytes. A flush
+    with a single pending message publishes it unwrapped; otherwise the frame
+    is {"type": "batch", "items": [...]}.
+    """
+
+    _by_room: "weakref.WeakKeyDictionary[rtc.Room, DataChannelBatcher]" = weakref.WeakKeyDictionary()
+
+    def __init__(
+        self,
+        room: rtc.Room,
+        max_messages: int = 16,
+        max_bytes: int = 14_000,
+        max_delay_ms: float = BATCH_MAX_DELAY_MS
+    ):
+        # Weak: _by_room's value must not keep its own key alive, or the entry never expires
+        self._room_ref = weakref.ref(room)
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self.max_delay = max_delay_ms / 1000
+        self._pending: deque = deque()
+        self._pending_bytes = 0
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.Task] = None
+
+    @classmethod
+    def for_room(cls, room: rtc.Room) -> "DataChannelBatcher":
+        """Get (or create) the batcher for a room"""
+        batcher = cls._by_room.get(room)
+        if batcher is None:
+            batcher = cls._by_room[room] = cls(room)
+        return batcher
+
+    async def enqueue(self, message: Dict) -> None:
+        """Add a message to the current window, flushing if the window is full"""
+        if USE_MSGPACK:
+            # Re-packed with its siblings at flush time; size is measured once here
+            item = _to_wire(message)
+            size = len(msgpack.packb(item, use_bin_type=True, datetime=True))
+        else:
+            item = _dumps(message)
+            size = len(item)
+        
+        self._pending.append(item)
+        self._pending_bytes += size
+        
+        if len(self._pending) >= self.max_messages or self._pending_bytes >= self.max_bytes:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_after_delay())
+
+    async def _flush_after_delay(self) -> None:
+        """Close the window after max_delay"""
+        await asyncio.sleep(self.max_delay)
+        self._timer = None
+        try:
+            await self.flush()
+        except Exception:
+            # Already logged by _publish; nobody awaits this task
+            pass
+
+    async def flush(self) -> None:
+        """Publish everything pending as one packet"""
+        async with self._lock:
+            if self._timer is not None and self._timer is not asyncio.current_task():
+                self._timer.cancel()
+            self._timer = None
+            
+            if not self._pending:
+                return
+            items = list(self._pending)
+            self._pending.clear()
+            self._pending_bytes = 0
+            
+            if USE_MSGPACK:
+                if len(items) == 1:
+                    payload = msgpack.packb(items[0], use_bin_type=True, datetime=True)
+                else:
+                    payload = msgpack.packb(
+                        {"v": _WIRE_VERSION, "t": _MESSAGE_TYPES["batch"], "it": items},
+                        use_bin_type=True,
+                        datetime=True
+                    )
+            elif len(items) == 1:
+                payload = items[0]
+            else:
+                # Splice the already-encoded JSON items instead of re-serializing them
+                payload = b'{"type":"batch","items":[' + b",".join(items) + b"]}"
+            
+            room = self._room_ref()
+            if room is None:
+                logger.debug("Room gone; dropping %d batched message(s)", len(items))
+                return
+            await LiveKitMessageSender._publish(room, payload)
+            logger.debug("✅ Data batch sent: %d message(s)", len(items))
+
+
 class InterviewTracker:
     """Track interview progress and statistics"""
     
@@ -281,43 +662,52 @@ class InterviewTracker:
         self.questions_asked = 0
         self.answers_received = 0
         self.start_time = datetime.now()
-        self.transcript = []
+        self.start_monotonic = time.monotonic()
         self.current_question = None
+        # Transcript stored column-wise, one entry per index.
+        # score/is_correct/is_partial are None for questions and unevaluated answers.
+        self.types: List[str] = []
+        self.contents: List[str] = []
+        self.question_numbers = array('i')
+        self.timestamps: List[str] = []
+        self.scores: List[Optional[float]] = []
+        self.correct_flags: List[Optional[bool]] = []
+        self.partial_flags: List[Optional[bool]] = []
+        # Each entry also serialized once as it's added, for get_transcript_json()
+        self._fragments: List[bytes] = []
+    
+    def _append(self, entry_type: str, content: str, evaluation: Optional[Dict] = None) -> None:
+        """Append one transcript entry across all columns"""
+        index = len(self.types)
+        self.types.append(entry_type)
+        self.contents.append(content)
+        self.question_numbers.append(self.questions_asked)
+        self.timestamps.append(_now_iso())
+        if evaluation:
+            self.scores.append(evaluation.get("score", 0))
+            self.correct_flags.append(evaluation.get("is_correct", False))
+            self.partial_flags.append(evaluation.get("is_partial", False))
+        else:
+            self.scores.append(None)
+            self.correct_flags.append(None)
+            self.partial_flags.append(None)
+        self._fragments.append(_dumps(self._entry(index)))
         
     def add_question(self, question: str) -> int:
         """Record a new question"""
         self.questions_asked += 1
         self.current_question = question
-        self.transcript.append({
-            "type": "question",
-            "content": question,
-            "number": self.questions_asked,
-            "timestamp": datetime.now().isoformat()
-        })
+        self._append("question", question)
         return self.questions_asked
     
     def add_answer(self, answer: str, evaluation: Optional[Dict] = None) -> None:
         """Record a candidate answer"""
         self.answers_received += 1
-        entry = {
-            "type": "answer",
-            "content": answer,
-            "question_number": self.questions_asked,
-            "timestamp": datetime.now().isoformat()
-        }
-        
-        if evaluation:
-            entry["evaluation"] = {
-                "score": evaluation.get("score", 0),
-                "is_correct": evaluation.get("is_correct", False),
-                "is_partial": evaluation.get("is_partial", False)
-            }
-        
-        self.transcript.append(entry)
+        self._append("answer", answer, evaluation)
     
     def get_current_stats(self) -> Dict:
         """Get current interview statistics"""
-        duration = (datetime.now() - self.start_time).total_seconds()
+        duration = time.monotonic() - self.start_monotonic
         
         return {
             "questions_asked": self.questions_asked,
@@ -326,9 +716,54 @@ class InterviewTracker:
             "response_rate": round((self.answers_received / self.questions_asked * 100), 1) if self.questions_asked > 0 else 0
         }
     
+    def get_transcript_columns(self) -> Dict[str, list]:
+        """Get the transcript as parallel columns (no per-entry dicts)"""
+        return {
+            "type": self.types,
+            "content": self.contents,
+            "question_number": self.question_numbers.tolist(),
+            "timestamp": self.timestamps,
+            "score": self.scores,
+            "is_correct": self.correct_flags,
+            "is_partial": self.partial_flags,
+        }
+    
+    def _entry(self, index: int) -> Dict:
+        """Build the dict form of one transcript entry from the columns"""
+        if self.types[index] == "question":
+            return {
+                "type": "question",
+                "content": self.contents[index],
+                "number": self.question_numbers[index],
+                "timestamp": self.timestamps[index]
+            }
+        
+        entry = {
+            "type": self.types[index],
+            "content": self.contents[index],
+            "question_number": self.question_numbers[index],
+            "timestamp": self.timestamps[index]
+        }
+        if self.scores[index] is not None:
+            entry["evaluation"] = {
+                "score": self.scores[index],
+                "is_correct": self.correct_flags[index],
+                "is_partial": self.partial_flags[index]
+            }
+        return entry
+    
     def get_transcript(self) -> list:
-        """Get full transcript"""
-        return self.transcript
+        """Get full transcript as a list of entry dicts"""
+        return [self._entry(i) for i in range(len(self.types))]
+    
+    def get_transcript_json(self) -> bytes:
+        """Get full transcript as a JSON array, spliced from the per-entry fragments"""
+        return b"[" + b",".join(self._fragments) + b"]"
+    
+    @property
+    def transcript(self) -> list:
+        """List-of-dicts view kept for older callers"""
+        return self.get_transcript()
 
 
 
@@ -3,9 +3,13 @@ from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 import openai
 import os
-from typing import Dict
+from typing import Awaitable, Callable, Dict, Optional
+import asyncio
+import httpx
+from dataclasses import dataclass
 import json
 import logging
+import orjson
 from livekit.agents import JobContext
 
 # Setup logging
@@ -23,51 +27,179 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Store active interview sessions
-active_sessions: Dict[str, dict] = {}
+# Prompt window: once more than HISTORY_SUMMARY_THRESHOLD messages are unsummarized,
+# everything but the last HISTORY_WINDOW is folded into a running summary
+HISTORY_WINDOW = 6
+HISTORY_SUMMARY_THRESHOLD = 12
+
+# Shared keep-alive HTTP client for database/backend calls; opened at startup
+http_client: Optional[httpx.AsyncClient] = None
+
+
+@app.on_event("startup")
+async def open_http_client():
+    global http_client
+    http_client = httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=100),
+        timeout=10.0
+    )
+
+
+@app.on_event("shutdown")
+async def close_http_client():
+    if http_client is not None:
+        await http_client.aclose()
+
+# One async OpenAI client (and connection pool) for the whole process
+_client: Optional[openai.AsyncOpenAI] = None
+
+
+def get_openai_client() -> openai.AsyncOpenAI:
+    """Get the shared async OpenAI client, creating it on first use"""
+    global _client
+    if _client is None:
+        _client = openai.AsyncOpenAI()
+    return _client
 
 class AIInterviewer:
     def __init__(self, agent_prompt: str, job_details: dict):
         self.agent_prompt = agent_prompt
         self.job_details = job_details
-        self.conversation_history = []
+        self.conversation_history = []  # Full transcript; only a window is sent to the LLM
+        self._history_summary = ""
+        self._summarized_upto = 0
         self.current_question_index = 0
-        
-    async def generate_question(self, previous_answer: str = None):
-        """Generate next interview question using OpenAI"""
-        
-        messages = [
-            {"role": "system", "content": self.agent_prompt},
-            {"role": "system", "content": f"Job Details: {json.dumps(self.job_details)}"}
+        self.client = get_openai_client()
+        # Fixed for the session; serialized once instead of on every turn
+        self._system_messages = [
+            {"role": "system", "content": agent_prompt},
+            {"role": "system", "content": "Job Details: " + orjson.dumps(job_details).decode()}
         ]
         
-        # Add conversation history
-        for msg in self.conversation_history:
-            messages.append(msg)
-            
+    async def generate_question(
+        self,
+        previous_answer: str = None,
+        on_delta: Optional[Callable[[str], Awaitable[None]]] = None
+    ):
+        """Generate next interview question using OpenAI, streaming tokens to on_delta"""
+        
         if previous_answer:
-            messages.append({"role": "user", "content": previous_answer})
+            self.conversation_history.append({"role": "user", "content": previous_answer})
+        
+        if len(self.conversation_history) - self._summarized_upto > HISTORY_SUMMARY_THRESHOLD:
+            await self._compress_history()
         
-        # Generate next question
-        response = openai.ChatCompletion.create(
+        messages = list(self._system_messages)
+        if self._history_summary:
+            messages.append({"role": "system", "content": "Summary so far: " + self._history_summary})
+        messages += self.conversation_history[self._summarized_upto:]
+        
+        # Generate next question, forwarding tokens as they arrive
+        stream = await self.client.chat.completions.create(
             model="gpt-4",
             messages=messages,
             max_tokens=200,
-            temperature=0.7
+            temperature=0.7,
+            stream=True
         )
         
-        question = response.choices[0].message.content
+        parts = []
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                if on_delta:
+                    await on_delta(delta)
+        
+        question = "".join(parts)
         self.conversation_history.append({"role": "assistant", "content": question})
         
         return question
 
+    async def _compress_history(self):
+        """Fold all but the last HISTORY_WINDOW messages into the running summary"""
+        cutoff = len(self.conversation_history) - HISTORY_WINDOW
+        older = self.conversation_history[self._summarized_upto:cutoff]
+        
+        prompt = (
+            "Summarize this interview so far in a few sentences: topics covered, "
+            "questions already asked, and how the candidate answered.\n\n"
+        )
+        if self._history_summary:
+            prompt += "Earlier summary: " + self._history_summary + "\n\n"
+        prompt += "Conversation:\n" + "\n".join(f"{m['role']}: {m['content']}" for m in older)
+        
+        try:
+            response = await self.client.chat.completions.create(
+                model="gpt-4",
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=300,
+                temperature=0.3
+            )
+        except Exception as e:
+            # Keep sending the longer window rather than failing the turn
+            logger.warning(f"⚠️ History summarization failed: {e}")
+            return
+        
+        self._history_summary = response.choices[0].message.content
+        self._summarized_upto = cutoff
+        logger.info(f"🗜️ Summarized {len(older)} older messages")
+
+@dataclass(slots=True)
+class SessionState:
+    """One live interview websocket session"""
+    websocket: WebSocket
+    ai_agent: AIInterviewer
+    session_id: str
+
+
+class SessionRegistry:
+    """Active interview sessions keyed by room_id"""
+
+    __slots__ = ("_sessions",)
+
+    def __init__(self):
+        self._sessions: Dict[str, SessionState] = {}
+
+    def get(self, room_id: str) -> Optional[SessionState]:
+        return self._sessions.get(room_id)
+
+    def add(self, room_id: str, state: SessionState) -> None:
+        self._sessions[room_id] = state
+
+    def remove(self, room_id: str) -> None:
+        self._sessions.pop(room_id, None)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+# Store active interview sessions
+active_sessions = SessionRegistry()
+
+
+async def ws_recv(websocket: WebSocket):
+    """Receive one JSON text frame, parsed with orjson"""
+    return orjson.loads(await websocket.receive_text())
+
+
+async def ws_send(websocket: WebSocket, message: dict):
+    """Send one JSON text frame, serialized with orjson"""
+    await websocket.send_text(orjson.dumps(message).decode())
+
 @app.websocket("/ws/interview/{room_id}")
 async def interview_websocket(websocket: WebSocket, room_id: str):
     await websocket.accept()
     
+    async def send_question_token(delta: str):
+        await ws_send(websocket, {'type': 'agent_question_token', 'delta': delta})
+    
     try:
         # Receive initial join message
-        data = await websocket.receive_json()
+        data = await ws_recv(websocket)
         
         if data['type'] == 'join' and data['role'] == 'candidate':
             session_id = data['sessionId']
@@ -81,22 +213,23 @@ async def interview_websocket(websocket: WebSocket, room_id: str):
                 job_details=session_data['job_details']
             )
             
-            active_sessions[room_id] = {
-                'websocket': websocket,
-                'ai_agent': ai_agent,
-                'session_id': session_id
-            }
+            active_sessions.add(room_id, SessionState(
+                websocket=websocket,
+                ai_agent=ai_agent,
+                session_id=session_id
+            ))
             
             # Notify candidate that agent joined
-            await websocket.send_json({
+            await ws_send(websocket, {
                 'type': 'agent_joined',
                 'message': 'AI Interviewer has joined'
             })
             
             # Start interview with first question
-            first_question = await ai_agent.generate_question()
+            first_question = await ai_agent.generate_question(on_delta=send_question_token)
+            await ws_send(websocket, {'type': 'agent_question_end'})
             
-            await websocket.send_json({
+            await ws_send(websocket, {
                 'type': 'agent_question',
                 'question': first_question,
                 'audioUrl': None  # Optional: generate TTS audio
@@ -104,28 +237,37 @@ async def interview_websocket(websocket: WebSocket, room_id: str):
             
         # Main message loop
         while True:
-            data = await websocket.receive_json()
+            data = await ws_recv(websocket)
             
             if data['type'] == 'candidate_response':
                 # Process candidate's answer
                 answer = data['answer']
                 
-                # Save transcript
-                await save_transcript(session_id, 'candidate', answer)
-                
-                # Generate next question
-                next_question = await ai_agent.generate_question(answer)
-                
-                await websocket.send_json({
-                    'type': 'agent_question',
-                    'question': next_question
-                })
+                # Save transcript while the next question is generated;
+                # the question goes out as soon as it's ready, the save is joined on exit
+                try:
+                    async with asyncio.TaskGroup() as tg:
+                        tg.create_task(save_transcript(session_id, 'candidate', answer))
+                        
+                        # Generate next question
+                        next_question = await ai_agent.generate_question(answer, on_delta=send_question_token)
+                        await ws_send(websocket, {'type': 'agent_question_end'})
+                        
+                        await ws_send(websocket, {
+                            'type': 'agent_question',
+                            'question': next_question
+                        })
+                except ExceptionGroup as eg:
+                    # Unwrap a lone failure so the WebSocketDisconnect handler below still sees it
+                    if len(eg.exceptions) == 1:
+                        raise eg.exceptions[0] from None
+                    raise
                 
             elif data['type'] == 'end_interview':
                 # Analyze interview and save results
                 analysis = await analyze_interview(ai_agent.conversation_history)
                 
-                await websocket.send_json({
+                await ws_send(websocket, {
                     'type': 'interview_complete',
                     'analysis': analysis
                 })
@@ -133,8 +275,7 @@ async def interview_websocket(websocket: WebSocket, room_id: str):
                 break
                 
     except WebSocketDisconnect:
-        if room_id in active_sessions:
-            del active_sessions[room_id]
+        active_sessions.remove(room_id)
     except Exception as e:
         print(f"Error: {e}")
         await websocket.close()
@@ -152,43 +293,57 @@ async def entrypoint(ctx: JobContext):
     try:
         if ctx.room.metadata:
             metadata = json.loads(ctx.room.metadata)
-    except:
+    except json.JSONDecodeError:
         pass
     
     # ... rest of your code
 
 async def get_session_from_db(session_id: str):
     """Fetch session details from Supabase"""
-    # Make API call to Next.js backend or directly to Supabase
+    # Make API call to Next.js backend or directly to Supabase via the shared http_client
     # Return session data including agent_prompt and job_details
     pass
 
 async def save_transcript(session_id: str, speaker: str, text: str):
     """Save message to database"""
-    # Insert into interview_messages table
+    # Insert into interview_messages table (use the shared http_client, not a new client per call)
     pass
 
+# Static instructions for analyze_interview(); the conversation goes in the user turn
+_ANALYSIS_SYSTEM_PROMPT = """Analyze the interview conversation you are given and respond with a JSON object of this shape:
+{
+  "score": <overall assessment score 0-100>,
+  "strengths": ["key strength", ...],
+  "improvements": ["area for improvement", ...],
+  "answer_feedback": ["specific feedback on an answer", ...],
+  "recommendation": "hiring recommendation"
+}
+Respond with the JSON object only."""
+
+
 async def analyze_interview(conversation_history: list):
     """Analyze entire interview and provide assessment"""
     
-    analysis_prompt = """
-    Analyze the following interview conversation and provide:
-    1. Overall assessment score (0-100)
-    2. Key strengths
-    3. Areas for improvement
-    4. Specific feedback on answers
-    5. Hiring recommendation
+    # Long transcripts: keep serialization off the event loop
+    conversation = await asyncio.to_thread(orjson.dumps, conversation_history)
     
-    Conversation:
-    """ + json.dumps(conversation_history)
-    
-    response = openai.ChatCompletion.create(
-        model="gpt-4",
-        messages=[{"role": "user", "content": analysis_prompt}],
-        max_tokens=500
+    response = await get_openai_client().chat.completions.create(
+        model="gpt-4o",  # JSON mode needs gpt-4o / gpt-4-turbo or newer
+        messages=[
+            {"role": "system", "content": _ANALYSIS_SYSTEM_PROMPT},
+            {"role": "user", "content": "Conversation:\n" + conversation.decode()}
+        ],
+        max_tokens=500,
+        response_format={"type": "json_object"}
     )
     
-    return response.choices[0].message.content
+    content = response.choices[0].message.content
+    try:
+        return orjson.loads(content)
+    except orjson.JSONDecodeError:
+        # e.g. cut off at max_tokens; hand back the raw text as before
+        logger.warning("⚠️ Interview analysis was not valid JSON; returning raw text")
+        return content
 
 @app.post("/api/candidate-joined")
 async def candidate_joined(data: dict):
@@ -198,5 +353,15 @@ async def candidate_joined(data: dict):
     return {"status": "success"}
 
 if __name__ == "__main__":
+    import sys
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # Workers need the app as an import string; uvloop/httptools come with uvicorn[standard]
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop" if sys.platform != "win32" else "asyncio",
+        http="httptools",
+        ws="websockets",
+        workers=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+    )
\ No newline at end of file
@@ -1,4 +1,5 @@
 # prompts.py - Interview Agent Prompts
+from functools import lru_cache
 
 INTERVIEWER_INSTRUCTIONS = """
 You are a professional AI interviewer conducting a job interview.
@@ -78,9 +79,13 @@ The hiring team will review your interview and get back to you soon with next st
 Is there anything you'd like to add or any questions you have for me before we conclude?
 """
 
-def get_question_prompt(job_title: str, question_category: str) -> str:
-    """Generate customized question prompt"""
-    return f"""
+# UTF-8 encoded once, for code that ships these over the wire as bytes
+INTERVIEWER_INSTRUCTIONS_BYTES = INTERVIEWER_INSTRUCTIONS.encode("utf-8")
+GREETING_MESSAGE_BYTES = GREETING_MESSAGE.encode("utf-8")
+CLOSING_MESSAGE_BYTES = CLOSING_MESSAGE.encode("utf-8")
+
+# Question prompt template, built once at import
+_QUESTION_TMPL = """
     You are interviewing a candidate for the position of {job_title}.
     
     Focus area: {question_category}
@@ -93,3 +98,8 @@ def get_question_prompt(job_title: str, question_category: str) -> str:
     
     Keep the question concise (1-2 sentences).
     """
+
+@lru_cache(maxsize=256)
+def get_question_prompt(job_title: str, question_category: str) -> str:
+    """Generate customized question prompt"""
+    return _QUESTION_TMPL.format(job_title=job_title, question_category=question_category)
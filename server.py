@@ -1,104 +1,374 @@
 # server.py - Backend API (Port 8001)
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
-import json
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import BaseModel, ConfigDict
+from typing import Optional, Any
 import logging
 from datetime import datetime
 import os
+import functools
+import time
+import zlib
 import asyncio
+from collections import OrderedDict, defaultdict
+from dataclasses import replace
+import orjson
+from cachetools import TTLCache
 from dotenv import load_dotenv
 from livekit import api
 
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
 # Import evaluation module
 from evaluator import AnswerEvaluator, get_evaluator
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+class _ExceptionRateLimit(logging.Filter):
+    """
+    Let each distinct failure log its traceback at most once per interval.
+    Repeats within the interval still log their message line, without the traceback.
+    """
+
+    def __init__(self, interval_s: float = 10.0):
+        super().__init__()
+        self.interval_s = interval_s
+        self._last_logged: dict[tuple, float] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not record.exc_info:
+            return True
+        key = (record.msg, record.exc_info[0])
+        now = time.monotonic()
+        last = self._last_logged.get(key)
+        if last is not None and now - last < self.interval_s:
+            record.exc_info = None
+            record.exc_text = None
+            return True
+        self._last_logged[key] = now
+        return True
+
+
+logger.addFilter(_ExceptionRateLimit())
+
+
+class _SkipHealthChecks(logging.Filter):
+    """Drop uvicorn access-log lines for /health probes"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # uvicorn.access args: (client_addr, method, path, http_version, status_code)
+        args = record.args
+        return not (isinstance(args, tuple) and len(args) > 2 and args[2] == "/health")
+
+
+logging.getLogger("uvicorn.access").addFilter(_SkipHealthChecks())
+
+load_dotenv()
+
 app = FastAPI(
     title="Interview Agent Backend API",
     description="Backend API for AI Interview Agent",
-    version="1.0.0"
+    version="1.0.0",
+    # Session reports and performance payloads are large nested dicts; orjson encodes them much faster
+    default_response_class=ORJSONResponse
 )
 
-# CORS Configuration
+# CORS Configuration: explicit origins (comma-separated CORS_ALLOW_ORIGINS, else the
+# frontend URL) so the middleware does a literal match instead of echoing any Origin
+ALLOWED_ORIGINS = [
+    origin.strip().rstrip('/')
+    for origin in os.getenv("CORS_ALLOW_ORIGINS", os.getenv("FRONTEND_URL", "http://localhost:3000")).split(",")
+    if origin.strip()
+]
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=ALLOWED_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Session reports and transcripts run to tens of KB; small bodies aren't worth compressing
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+# Store active sessions and candidate details; bounded and TTL-evicted so rooms
+# that never finish (or never call /token) don't accumulate forever.
+# TTLCache isn't thread-safe, which is fine: it is only touched from the event loop
+MAX_TRACKED_ROOMS = 10_000
+ACTIVE_SESSION_TTL_S = 2 * 3600
+CANDIDATE_DETAILS_TTL_S = 600
+SESSION_REPORT_COMPRESS_LEVEL = 6
+CACHE_SWEEP_INTERVAL_S = 60
+active_sessions = TTLCache(maxsize=MAX_TRACKED_ROOMS, ttl=ACTIVE_SESSION_TTL_S)
+agent_status = TTLCache(maxsize=MAX_TRACKED_ROOMS, ttl=ACTIVE_SESSION_TTL_S)
+candidate_details_store = TTLCache(maxsize=MAX_TRACKED_ROOMS, ttl=CANDIDATE_DETAILS_TTL_S)
+# Per-room future that /token requests await when candidate details haven't arrived;
+# the producer stores first and then resolves it, so no wakeup can be lost.
+# TTL-bounded because a room whose details never arrive leaves its future behind
+candidate_details_waiters = TTLCache(maxsize=MAX_TRACKED_ROOMS, ttl=CANDIDATE_DETAILS_TTL_S)
+# Frontend WebSockets listening for agent/session events, per room
+room_subscribers: defaultdict[str, set[WebSocket]] = defaultdict(set)
+# Seconds without a frame before a room WebSocket is pinged, and closed after a second lapse
+WS_IDLE_TIMEOUT_S = 120
+# Prebuilt keepalive frames (text, as the browser client expects JSON strings)
+_PING_FRAME = '{"type":"ping"}'
+_PONG_FRAME = '{"type":"pong"}'
+_CLIENT_PING_FRAMES = frozenset({'{"type":"ping"}', '{"type": "ping"}'})
 
-# Store active sessions and candidate details
-active_sessions = {}
-agent_status = {}
-candidate_details_store = {}
-candidate_details_events: dict[str, asyncio.Event] = {}
 
 # ============ LiveKit Configuration =============
-load_dotenv()
 LIVEKIT_URL = os.getenv("LIVEKIT_URL")
 LIVEKIT_API_KEY = os.getenv("LIVEKIT_API_KEY")
 LIVEKIT_API_SECRET = os.getenv("LIVEKIT_API_SECRET")
+LIVEKIT_AGENT_NAME = os.getenv("LIVEKIT_AGENT_NAME", "interview")  # ✅ Match .env value
+LIVEKIT_CONFIGURED = all([LIVEKIT_URL, LIVEKIT_API_KEY, LIVEKIT_API_SECRET])
+if not LIVEKIT_CONFIGURED:
+    logger.error("❌ LIVEKIT_URL / LIVEKIT_API_KEY / LIVEKIT_API_SECRET not set - /token will fail")
+
+_make_token = functools.partial(api.AccessToken, api_key=LIVEKIT_API_KEY, api_secret=LIVEKIT_API_SECRET)
+
+# Grants are the same for every participant apart from the room; cloned per request
+_GRANTS = api.VideoGrants(room_join=True, can_publish=True, can_subscribe=True)
+# Recently signed tokens keyed by (room, identity, agent metadata) so retries and
+# reconnects with unchanged details reuse the JWT instead of signing a new one
+TOKEN_CACHE_TTL_S = 60
+TOKEN_CACHE_SIZE = 256
+_token_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+# /token success body has a fixed shape: the URL is encoded once, the JWT is base64url
+# (no escaping needed), and only identity/room go through the JSON encoder per request
+_TOKEN_RESPONSE_TMPL = b'{"url":' + orjson.dumps(LIVEKIT_URL).replace(b"%", b"%%") + b',"token":"%s","identity":%s,"room":%s}'
+
+# Optional Redis (REDIS_URL) so candidate details and session reports are shared
+# between uvicorn workers; without it everything stays in this process
+REDIS_URL = os.getenv("REDIS_URL")
+SESSION_REPORT_TTL_S = 24 * 3600
+CANDIDATE_READY_CHANNEL = "candidate_ready"
+CANDIDATE_POLL_DELAYS_S = (0.005, 0.02, 0.05)
+redis_client = None
+cache_sweeper_task: Optional[asyncio.Task] = None
+
+
+@app.on_event("startup")
+async def connect_redis():
+    global redis_client
+    if REDIS_URL and aioredis is not None:
+        redis_client = aioredis.from_url(REDIS_URL)
+        logger.info("✅ Using Redis for shared candidate details / session reports")
+    elif REDIS_URL:
+        logger.warning("⚠️ REDIS_URL is set but the redis package is not installed; using in-memory stores")
+
+
+@app.on_event("shutdown")
+async def close_redis():
+    if redis_client is not None:
+        await redis_client.aclose()
+
+
+async def _sweep_expired_entries():
+    """Evict expired TTLCache entries periodically, not only when a room is touched again"""
+    while True:
+        await asyncio.sleep(CACHE_SWEEP_INTERVAL_S)
+        for cache in (active_sessions, agent_status, candidate_details_store, candidate_details_waiters):
+            cache.expire()
+
+
+@app.on_event("startup")
+async def start_cache_sweeper():
+    global cache_sweeper_task
+    cache_sweeper_task = asyncio.create_task(_sweep_expired_entries())
+
+
+@app.on_event("shutdown")
+async def stop_cache_sweeper():
+    if cache_sweeper_task is not None:
+        cache_sweeper_task.cancel()
+
+
+async def _store_and_notify(room_name: str, data: dict) -> None:
+    """Store candidate details and wake every /token request waiting on that room"""
+    candidate_details_store[room_name] = data
+    if redis_client is not None:
+        # Shared with the other workers; whichever one handles /token picks it up
+        # SET and PUBLISH in one round trip; the room's channel only reaches its own waiters
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.set(f"candidate:{room_name}", orjson.dumps(data), ex=CANDIDATE_DETAILS_TTL_S)
+            pipe.publish(f"{CANDIDATE_READY_CHANNEL}:{room_name}", b"1")
+            await pipe.execute()
+    waiter = candidate_details_waiters.pop(room_name, None)
+    if waiter is not None and not waiter.done():
+        waiter.set_result(data)
+
+
+async def _get_candidate_details(room_name: str) -> Optional[dict]:
+    """Look up candidate details in this worker, then in Redis if configured"""
+    data = candidate_details_store.get(room_name)
+    if data is None and redis_client is not None:
+        raw = await redis_client.get(f"candidate:{room_name}")
+        if raw is not None:
+            data = orjson.loads(raw)
+    return data
+
+
+async def _wait_for_candidate_details(room_name: str) -> dict:
+    """Block until candidate details for room_name are stored (caller applies the timeout)"""
+    if redis_client is None:
+        data = candidate_details_store.get(room_name)
+        if data is not None:
+            return data
+        waiter = candidate_details_waiters.get(room_name)
+        if waiter is None:
+            waiter = candidate_details_waiters[room_name] = asyncio.get_running_loop().create_future()
+        # shield: one request timing out must not cancel the future other requests share
+        return await asyncio.shield(waiter)
+    
+    # Details usually land a few ms after /token; a few quick GETs cover that case
+    # without opening a pub/sub connection
+    for delay in CANDIDATE_POLL_DELAYS_S:
+        await asyncio.sleep(delay)
+        data = await _get_candidate_details(room_name)
+        if data is not None:
+            return data
+    
+    # Subscribe before re-checking so a publish between the two can't be missed
+    channel = f"{CANDIDATE_READY_CHANNEL}:{room_name}"
+    pubsub = redis_client.pubsub()
+    await pubsub.subscribe(channel)
+    try:
+        data = await _get_candidate_details(room_name)
+        while data is None:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=None)
+            if message:
+                data = await _get_candidate_details(room_name)
+        return data
+    finally:
+        await pubsub.unsubscribe(channel)
+        await pubsub.aclose()
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_agent_prompt(raw: str) -> dict:
+    """Parse a JSON agent template; the same job template is reused across many rooms.
+    The result is shared between calls, so callers must not mutate it"""
+    return orjson.loads(raw)
+
+
+# Request bodies are read-only once parsed; unknown fields from clients are dropped
+_REQUEST_MODEL_CONFIG = ConfigDict(frozen=True, extra='ignore')
+
 
 class TokenRequest(BaseModel):
+    model_config = _REQUEST_MODEL_CONFIG
+
     room: str
     identity: str
     metadata: str | None = None
     candidateDetails: dict | None = None  # Accept candidate details directly in token request
 
 class AnswerEvaluationRequest(BaseModel):
+    model_config = _REQUEST_MODEL_CONFIG
+
     room_id: str
     question: str
     answer: str
     candidate_id: Optional[str] = None
     question_number: Optional[int] = None
-    expected_keywords: Optional[List[str]] = None
+    expected_keywords: Optional[list[str]] = None
     difficulty_level: str = "medium"
 
 class CompleteInterviewRequest(BaseModel):
+    model_config = _REQUEST_MODEL_CONFIG
+
     room_id: str
     session_id: Optional[str] = None
     candidate_id: Optional[str] = None
 
 class SessionReportRequest(BaseModel):
+    model_config = _REQUEST_MODEL_CONFIG
+
     room_id: str
     candidate_id: Optional[str] = None
     candidate_name: Optional[str] = None
     candidate_email: Optional[str] = None
     job_id: Optional[str] = None
-    performance: Dict[str, Any]
-    transcript: List[Dict[str, Any]]
+    performance: dict[str, Any]
+    transcript: list[dict[str, Any]]
     start_time: Optional[str] = None
     end_time: Optional[str] = None
-    responses: List[Dict[str, Any]] = []
+    responses: list[dict[str, Any]] = []
+
+
+def _build_metadata(frontend_metadata: Optional[str], candidate_data: Optional[dict], session_data: Optional[dict]) -> dict:
+    """
+    Build the agent dispatch metadata for one /token request
+    
+    Args:
+        frontend_metadata: Raw metadata string from the token request (JSON or plain text)
+        candidate_data: Candidate details from the request body or the store
+        session_data: This room's active_sessions entry, if /start-interview ran
+    
+    Returns:
+        Dict: Metadata the agent receives as ctx.job.metadata
+    """
+    metadata_dict = {}
+    if frontend_metadata:
+        # Only a JSON object can be merged into; anything else is passed through as text
+        # without attempting a parse
+        parsed = None
+        if frontend_metadata[:1] == '{':
+            try:
+                parsed = orjson.loads(frontend_metadata)
+            except orjson.JSONDecodeError:
+                pass
+        metadata_dict = parsed if isinstance(parsed, dict) else {"metadata": frontend_metadata}
+    
+    if candidate_data:
+        metadata_dict['candidateDetails'] = candidate_data
+        
+        # Extract agent template/prompt
+        agent_template = (
+            candidate_data.get('agentPrompt') or
+            candidate_data.get('agent_template') or 
+            candidate_data.get('agentTemplate') or 
+            candidate_data.get('agent_prompt')
+        )
+        
+        if agent_template:
+            # Sent once under agentPrompt; a JSON-encoded template is forwarded as the object
+            if isinstance(agent_template, str) and agent_template[:1] == '{':
+                try:
+                    agent_template = _parse_agent_prompt(agent_template)
+                except orjson.JSONDecodeError:
+                    pass
+            metadata_dict['agentPrompt'] = agent_template
+    
+    # Add session context
+    if session_data:
+        metadata_dict['sessionId'] = session_data.get('session_id')
+        metadata_dict['jobDetails'] = session_data.get('job_details', {})
+    
+    return metadata_dict
+
 
 @app.post("/token")
-async def generate_token(req: TokenRequest):
+async def generate_token(req: TokenRequest, share: bool = False):
     """Generate LiveKit token with full candidate details"""
     try:
-        if not all([LIVEKIT_URL, LIVEKIT_API_KEY, LIVEKIT_API_SECRET]):
+        if not LIVEKIT_CONFIGURED:
             raise HTTPException(status_code=500, detail="LiveKit env vars missing")
 
-        logger.info("=" * 80)
-        logger.info(f"🔑 TOKEN REQUEST RECEIVED")
-        logger.info(f"📋 Room: {req.room}")
-        logger.info(f"👤 Identity: {req.identity}")
-        logger.info(f"📥 Has candidateDetails in request: {bool(req.candidateDetails)}")
-        logger.info("=" * 80)
-        
-        # Parse frontend metadata
-        metadata_dict = {}
-        if req.metadata:
-            try:
-                metadata_dict = json.loads(req.metadata)
-                logger.info(f"📦 Parsed frontend metadata: {list(metadata_dict.keys())}")
-            except json.JSONDecodeError:
-                metadata_dict = {"metadata": req.metadata}
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("=" * 80)
+            logger.debug("🔑 TOKEN REQUEST RECEIVED")
+            logger.debug("📋 Room: %s", req.room)
+            logger.debug("👤 Identity: %s", req.identity)
+            logger.debug("📥 Has candidateDetails in request: %s", bool(req.candidateDetails))
+            logger.debug("=" * 80)
         
         # Step 1: Check if candidate details are in request body (NEW - supports both orders)
         room_name = req.room
@@ -107,36 +377,26 @@ async def generate_token(req: TokenRequest):
         if req.candidateDetails:
             logger.info("✅ Found candidateDetails in token request body")
             candidate_data = req.candidateDetails
-            # Also store it for future use
-            candidate_details_store[room_name] = candidate_data
-            logger.info(f"💾 Stored candidate details in store for room: {room_name}")
-            # Notify any waiting token requests
-            event = candidate_details_events.get(room_name)
-            if event:
-                logger.info("🔔 Notifying waiting token requests from request body data")
-                event.set()
-                candidate_details_events.pop(room_name, None)
+            # Only stored when asked to (?share=true) or when another /token here is waiting on it
+            if share or room_name in candidate_details_waiters:
+                await _store_and_notify(room_name, candidate_data)
+                logger.info("💾 Stored candidate details in store for room: %s", room_name)
         
         # Step 2: Check store (fallback if not in request body)
-        if not candidate_data and room_name in candidate_details_store:
-            logger.info(f"✅ Found candidate details in store for room: {room_name}")
-            candidate_data = candidate_details_store[room_name]
+        if not candidate_data:
+            candidate_data = await _get_candidate_details(room_name)
+            if candidate_data:
+                logger.info("✅ Found candidate details in store for room: %s", room_name)
         
         # Step 2.5: If still no candidate data, wait for candidate details (race condition fix)
         if not candidate_data:
-            logger.warning(f"⚠️ Candidate details not found yet for room: {room_name}")
-            event = candidate_details_events.get(room_name)
-            if not event:
-                event = asyncio.Event()
-                candidate_details_events[room_name] = event
+            logger.warning("⚠️ Candidate details not found yet for room: %s", room_name)
             try:
                 logger.info("⏳ Waiting up to 5 seconds for candidate details to arrive...")
-                await asyncio.wait_for(event.wait(), timeout=5)
-                candidate_data = candidate_details_store.get(room_name)
-                if candidate_data:
-                    logger.info("✅ Candidate details arrived during wait")
-                else:
-                    logger.error("❌ Event signaled but candidate details missing")
+                # asyncio.timeout cancels in place; wait_for would wrap the wait in a new Task
+                async with asyncio.timeout(5):
+                    candidate_data = await _wait_for_candidate_details(room_name)
+                logger.info("✅ Candidate details arrived during wait")
             except asyncio.TimeoutError:
                 logger.error("⏰ Timed out waiting for candidate details (5s)")
                 raise HTTPException(
@@ -144,92 +404,50 @@ async def generate_token(req: TokenRequest):
                     detail="Candidate details not yet available. Ensure /agent/candidate-details is called before /token."
                 )
         
-        # Step 3: Add candidate details to metadata if found
+        # Step 3: Build the dispatch metadata
         if candidate_data:
-            logger.info("=" * 80)
-            logger.info(f"📋 CANDIDATE DETAILS FOUND:")
-            logger.info(f"   👤 Name: {candidate_data.get('candidateName', 'N/A')}")
-            logger.info(f"   💼 Job: {candidate_data.get('jobTitle', 'N/A')}")
-            logger.info(f"   🛠️ Skills: {candidate_data.get('candidateSkills', 'N/A')}")
-            logger.info("=" * 80)
-            # Clear pending event if exists
-            candidate_details_events.pop(room_name, None)
-            # Remove from store after use to avoid stale data
-            candidate_details_store.pop(room_name, None)
-            
-            # Add to metadata
-            metadata_dict['candidateDetails'] = candidate_data
-            
-            # Extract agent template/prompt
-            agent_template = (
-                candidate_data.get('agentPrompt') or
-                candidate_data.get('agent_template') or 
-                candidate_data.get('agentTemplate') or 
-                candidate_data.get('agent_prompt')
-            )
-            
-            if agent_template:
-                # Handle if agentPrompt is a JSON string
-                if isinstance(agent_template, str) and agent_template.startswith('{'):
-                    try:
-                        agent_prompt_obj = json.loads(agent_template)
-                        metadata_dict['agentPrompt'] = agent_prompt_obj
-                        metadata_dict['agentTemplate'] = agent_prompt_obj
-                        metadata_dict['agent_template'] = agent_prompt_obj
-                        logger.info(f"✅ Agent template (JSON) added")
-                    except:
-                        metadata_dict['agentPrompt'] = agent_template
-                        metadata_dict['agentTemplate'] = agent_template
-                        metadata_dict['agent_template'] = agent_template
-                        logger.info(f"✅ Agent template (string) added")
-                else:
-                    metadata_dict['agentPrompt'] = agent_template
-                    metadata_dict['agentTemplate'] = agent_template
-                    metadata_dict['agent_template'] = agent_template
-                    logger.info(f"✅ Agent template added")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("=" * 80)
+                logger.debug("📋 CANDIDATE DETAILS FOUND:")
+                logger.debug("   👤 Name: %s", candidate_data.get('candidateName', 'N/A'))
+                logger.debug("   💼 Job: %s", candidate_data.get('jobTitle', 'N/A'))
+                logger.debug("   🛠️ Skills: %s", candidate_data.get('candidateSkills', 'N/A'))
+                logger.debug("=" * 80)
         else:
-            logger.warning("=" * 80)
-            logger.warning(f"⚠️ NO CANDIDATE DETAILS FOUND!")
-            logger.warning(f"⚠️ Room: {room_name}")
-            logger.warning(f"⚠️ Store size: {len(candidate_details_store)}")
-            logger.warning(f"⚠️ Available rooms: {list(candidate_details_store.keys())}")
-            logger.warning("=" * 80)
-        
-        # Add session context
-        if room_name in active_sessions:
-            session_data = active_sessions[room_name]
-            metadata_dict['sessionId'] = session_data.get('session_id')
-            metadata_dict['jobDetails'] = session_data.get('job_details', {})
-        
-        
-        agent_name = os.getenv("LIVEKIT_AGENT_NAME", "interview")  # ✅ Match .env value
-        logger.info("=" * 80)
-        logger.info(f"🤖 DISPATCHING AGENT")
-        logger.info(f"   Agent Name: {agent_name}")
-        logger.info(f"   Room: {req.room}")
-        logger.info(f"   Identity: {req.identity}")
-        logger.info(f"   Final metadata keys: {list(metadata_dict.keys())}")
-        logger.info(f"   ✅ candidateDetails present: {bool(metadata_dict.get('candidateDetails'))}")
-        if metadata_dict.get('candidateDetails'):
-            cd = metadata_dict['candidateDetails']
-            logger.info(f"   👤 Candidate: {cd.get('candidateName', 'N/A')}")
-            logger.info(f"   💼 Job: {cd.get('jobTitle', 'N/A')}")
-        logger.info("=" * 80)
+            logger.warning("⚠️ No candidate details found for room %s (store size: %s)", room_name, len(candidate_details_store))
+        
+        metadata_dict = _build_metadata(req.metadata, candidate_data, active_sessions.get(room_name))
+        
+        agent_name = LIVEKIT_AGENT_NAME
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("=" * 80)
+            logger.debug("🤖 DISPATCHING AGENT")
+            logger.debug("   Agent Name: %s", agent_name)
+            logger.debug("   Room: %s", req.room)
+            logger.debug("   Identity: %s", req.identity)
+            logger.debug("   Final metadata keys: %s", list(metadata_dict.keys()))
+            logger.debug("   ✅ candidateDetails present: %s", bool(metadata_dict.get('candidateDetails')))
+            if metadata_dict.get('candidateDetails'):
+                cd = metadata_dict['candidateDetails']
+                logger.debug("   👤 Candidate: %s", cd.get('candidateName', 'N/A'))
+                logger.debug("   💼 Job: %s", cd.get('jobTitle', 'N/A'))
+            logger.debug("=" * 80)
 
         # Generate token with enriched metadata
         # IMPORTANT: RoomAgentDispatch metadata goes to ctx.job.metadata in agent
-        agent_metadata_json = json.dumps(metadata_dict, ensure_ascii=False)
-        
-        logger.info("=" * 80)
-        logger.info(f"📤 FINAL METADATA BEING SENT TO AGENT:")
-        logger.info(f"   Metadata length: {len(agent_metadata_json)} bytes")
-        logger.info(f"   Has candidateDetails: {bool(metadata_dict.get('candidateDetails'))}")
-        if metadata_dict.get('candidateDetails'):
-            cd = metadata_dict['candidateDetails']
-            logger.info(f"   👤 Candidate: {cd.get('candidateName', 'N/A')}")
-            logger.info(f"   💼 Job: {cd.get('jobTitle', 'N/A')}")
-        logger.info(f"   All keys: {list(metadata_dict.keys())}")
-        logger.info("=" * 80)
+        agent_metadata_json = orjson.dumps(metadata_dict).decode()
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("=" * 80)
+            logger.debug("📤 FINAL METADATA BEING SENT TO AGENT:")
+            logger.debug("   Metadata length: %s bytes", len(agent_metadata_json))
+            logger.debug("   Has candidateDetails: %s", bool(metadata_dict.get('candidateDetails')))
+            if metadata_dict.get('candidateDetails'):
+                cd = metadata_dict['candidateDetails']
+                logger.debug("   👤 Candidate: %s", cd.get('candidateName', 'N/A'))
+                logger.debug("   💼 Job: %s", cd.get('jobTitle', 'N/A'))
+            logger.debug("   All keys: %s", list(metadata_dict.keys()))
+            logger.debug("=" * 80)
         
         # Create RoomAgentDispatch configuration
         agent_dispatch = api.RoomAgentDispatch(
@@ -238,46 +456,50 @@ async def generate_token(req: TokenRequest):
         )
         
         
-        logger.info(f"🔧 Agent Dispatch Created:")
-        logger.info(f"   - Agent Name: {agent_dispatch.agent_name}")
-        logger.info(f"   - Metadata Present: {bool(agent_dispatch.metadata)}")
-        logger.info(f"   - Metadata Length: {len(agent_dispatch.metadata) if agent_dispatch.metadata else 0} bytes")
-        # ✅ ADD: Log first 500 chars of metadata for debugging
-        if agent_dispatch.metadata:
-            logger.info(f"   - Metadata preview: {agent_dispatch.metadata[:500]}...")
-        
-        
-        token = (
-            api.AccessToken(api_key=LIVEKIT_API_KEY, api_secret=LIVEKIT_API_SECRET)
-            .with_identity(req.identity)
-            .with_grants(
-                api.VideoGrants(
-                    room_join=True,
-                    room=req.room,
-                    can_publish=True,
-                    can_subscribe=True,
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("🔧 Agent Dispatch Created:")
+            logger.debug("   - Agent Name: %s", agent_dispatch.agent_name)
+            logger.debug("   - Metadata Present: %s", bool(agent_dispatch.metadata))
+            logger.debug("   - Metadata Length: %s bytes", len(agent_dispatch.metadata) if agent_dispatch.metadata else 0)
+            # ✅ ADD: Log first 500 chars of metadata for debugging
+            if agent_dispatch.metadata:
+                logger.debug("   - Metadata preview: %s...", agent_dispatch.metadata[:500])
+        
+        
+        cache_key = (req.room, req.identity, agent_metadata_json)
+        cached = _token_cache.get(cache_key)
+        now = time.monotonic()
+        if cached is not None and now - cached[1] < TOKEN_CACHE_TTL_S:
+            _token_cache.move_to_end(cache_key)
+            token = cached[0]
+            logger.info("♻️ Reusing token for %s in room %s", req.identity, req.room)
+        else:
+            token = (
+                _make_token()
+                .with_identity(req.identity)
+                .with_grants(replace(_GRANTS, room=req.room))
+                .with_room_config(
+                    api.RoomConfiguration(
+                        agents=[agent_dispatch]
+                    )
                 )
+                .to_jwt()
             )
-            .with_room_config(
-                api.RoomConfiguration(
-                    agents=[agent_dispatch]
-                )
+            _token_cache[cache_key] = (token, now)
+            _token_cache.move_to_end(cache_key)
+            if len(_token_cache) > TOKEN_CACHE_SIZE:
+                _token_cache.popitem(last=False)
+            logger.info(
+                "✅ Token generated - agent %s dispatched to room %s", agent_name, req.room,
+                extra={"room": req.room, "identity": req.identity, "agent_name": agent_name}
             )
-            .to_jwt()
+        return Response(
+            content=_TOKEN_RESPONSE_TMPL % (token.encode(), orjson.dumps(req.identity), orjson.dumps(req.room)),
+            media_type="application/json"
         )
         
-        logger.info(f"✅ Token generated successfully with agent dispatch")
-        logger.info(f"📋 Agent '{agent_name}' will be dispatched to room '{req.room}'")
-        logger.info("=" * 60)
-        return {
-            "url": LIVEKIT_URL, 
-            "token": token, 
-            "identity": req.identity, 
-            "room": req.room
-        }
-        
     except Exception as e:
-        logger.error(f"❌ Token generation failed: {e}")
+        logger.error("❌ Token generation failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/agent-ready")
@@ -286,7 +508,7 @@ async def agent_ready(data: dict):
     session_id = data.get('sessionId')
     room_name = data.get('roomName')
     
-    logger.info(f"✅ Agent ready - Session: {session_id}, Room: {room_name}")
+    logger.info("✅ Agent ready - Session: %s, Room: %s", session_id, room_name)
     
     agent_status[session_id] = {
         'status': 'ready',
@@ -295,17 +517,11 @@ async def agent_ready(data: dict):
     }
     
     # Notify WebSocket clients
-    if room_name in active_sessions:
-        ws = active_sessions[room_name].get('websocket')
-        if ws:
-            try:
-                await ws.send_json({
-                    'type': 'agent_joined',
-                    'message': 'AI Interviewer has joined',
-                    'sessionId': session_id
-                })
-            except Exception as e:
-                logger.error(f"❌ WS notification failed: {e}")
+    await _broadcast(room_name, {
+        'type': 'agent_joined',
+        'message': 'AI Interviewer has joined',
+        'sessionId': session_id
+    })
     
     return {"status": "success"}
 
@@ -329,7 +545,7 @@ async def start_interview(data: dict):
             'status': 'active'
         }
         
-        logger.info(f"✅ Interview session started: {session_id}")
+        logger.info("✅ Interview session started: %s", session_id)
         
         return {
             "status": "success",
@@ -338,47 +554,35 @@ async def start_interview(data: dict):
         }
         
     except Exception as e:
-        logger.error(f"❌ Start interview failed: {e}")
+        logger.error("❌ Start interview failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/agent/candidate-details")
 async def store_candidate_details(request: Request):
     """Store candidate details sent from frontend - CRITICAL: Call this BEFORE /token"""
     try:
-        logger.info("=" * 80)
-        logger.info("📥 RECEIVING CANDIDATE DETAILS")
-        logger.info("=" * 80)
-        
-        data = await request.json()
+        data = orjson.loads(await request.body())
         room_name = data.get("roomName") or data.get("room_name")
         
         if not room_name:
             logger.error("❌ Missing roomName")
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=400,
                 content={"error": "roomName is required"}
             )
+        
+        # Store data (and Redis if configured) and notify any waiting /token requests
+        await _store_and_notify(room_name, data)
 
-        logger.info(f"📋 Room Name: {room_name}")
-        logger.info(f"📦 Data keys received: {list(data.keys())}")
-        
-        # Store data in memory (can later be moved to Redis/DB)
-        candidate_details_store[room_name] = data
-        # Notify any waiting /token requests
-        event = candidate_details_events.get(room_name)
-        if event and not event.is_set():
-            logger.info("🔔 Notifying pending token request waiting for candidate details")
-            event.set()
-            candidate_details_events.pop(room_name, None)
-
-        logger.info("=" * 80)
-        logger.info(f"✅ CANDIDATE DETAILS STORED SUCCESSFULLY")
-        logger.info(f"   Room: {room_name}")
-        logger.info(f"   Candidate: {data.get('candidateName', 'N/A')}")
-        logger.info(f"   Job Title: {data.get('jobTitle', 'N/A')}")
-        logger.info(f"   Store size: {len(candidate_details_store)}")
-        logger.info(f"   All rooms in store: {list(candidate_details_store.keys())}")
-        logger.info("=" * 80)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("=" * 80)
+            logger.debug("✅ CANDIDATE DETAILS STORED")
+            logger.debug("   Room: %s", room_name)
+            logger.debug("   Candidate: %s", data.get('candidateName', 'N/A'))
+            logger.debug("   Job Title: %s", data.get('jobTitle', 'N/A'))
+            logger.debug("   Data keys: %s", list(data))
+            logger.debug("   Store size: %s", len(candidate_details_store))
+            logger.debug("=" * 80)
 
         return {
             "status": "success", 
@@ -387,10 +591,8 @@ async def store_candidate_details(request: Request):
             "note": "Now you can call /token endpoint"
         }
     except Exception as e:
-        logger.error(f"❌ Error saving candidate details: {e}")
-        import traceback
-        traceback.print_exc()
-        return JSONResponse(
+        logger.exception("❌ Error saving candidate details: %s", e)
+        return ORJSONResponse(
             status_code=500,
             content={"error": str(e)}
         )
@@ -398,19 +600,43 @@ async def store_candidate_details(request: Request):
 @app.get("/agent/candidate-details/{room_name}")
 async def get_candidate_details(room_name: str):
     """Get stored candidate details for a room"""
-    if room_name not in candidate_details_store:
+    details = await _get_candidate_details(room_name)
+    if details is None:
         raise HTTPException(status_code=404, detail="Candidate details not found")
     
     return {
         "status": "success",
-        "details": candidate_details_store[room_name]
+        "details": details
     }
 
+async def _broadcast(room_name: str, message: dict) -> int:
+    """Send one event to every WebSocket subscribed to a room; returns how many got it"""
+    subscribers = room_subscribers.get(room_name)
+    if not subscribers:
+        return 0
+    payload = orjson.dumps(message).decode()
+    targets = list(subscribers)
+    results = await asyncio.gather(
+        *(ws.send_text(payload) for ws in targets),
+        return_exceptions=True
+    )
+    sent = 0
+    for ws, result in zip(targets, results):
+        if isinstance(result, Exception):
+            logger.warning("⚠️ Could not send WebSocket notification: %s", result)
+            subscribers.discard(ws)
+        else:
+            sent += 1
+    if not subscribers:
+        room_subscribers.pop(room_name, None)
+    return sent
+
 @app.websocket("/ws/interview/{room_id}")
 async def interview_websocket(websocket: WebSocket, room_id: str):
     """WebSocket for real-time interview updates"""
     await websocket.accept()
-    logger.info(f"✅ WebSocket connected: {room_id}")
+    logger.info("✅ WebSocket connected: %s", room_id)
+    room_name = None
     
     try:
         # Store websocket connection
@@ -418,28 +644,45 @@ async def interview_websocket(websocket: WebSocket, room_id: str):
         
         if data.get('type') == 'join':
             room_name = data.get('roomName') or room_id
-            if room_name in active_sessions:
-                active_sessions[room_name]['websocket'] = websocket
-            else:
-                active_sessions[room_name] = {'websocket': websocket}
+            room_subscribers[room_name].add(websocket)
         
-        # Keep connection alive
+        # Keep connection alive; a silent client gets one ping, then is closed
+        idle_timeouts = 0
         while True:
-            data = await websocket.receive_json()
+            try:
+                async with asyncio.timeout(WS_IDLE_TIMEOUT_S):
+                    text = await websocket.receive_text()
+            except TimeoutError:
+                idle_timeouts += 1
+                if idle_timeouts >= 2:
+                    logger.info("⏱️ Closing idle WebSocket: %s", room_id)
+                    await websocket.close()
+                    break
+                await websocket.send_text(_PING_FRAME)
+                continue
+            idle_timeouts = 0
+            
+            # Keepalives are answered by exact match, without a JSON round trip
+            if text in _CLIENT_PING_FRAMES:
+                await websocket.send_text(_PONG_FRAME)
+                continue
             
+            data = orjson.loads(text)
             if data.get('type') == 'ping':
-                await websocket.send_json({'type': 'pong'})
+                await websocket.send_text(_PONG_FRAME)
             elif data.get('type') == 'end_interview':
                 break
             
     except WebSocketDisconnect:
-        logger.info(f"❌ WebSocket disconnected: {room_id}")
+        logger.info("❌ WebSocket disconnected: %s", room_id)
     finally:
         # Clean up
-        for key in list(active_sessions.keys()):
-            if active_sessions[key].get('websocket') == websocket:
-                if 'websocket' in active_sessions[key]:
-                    del active_sessions[key]['websocket']
+        if room_name is not None:
+            subscribers = room_subscribers.get(room_name)
+            if subscribers is not None:
+                subscribers.discard(websocket)
+                if not subscribers:
+                    del room_subscribers[room_name]
 
 @app.post("/api/evaluate-answer")
 async def evaluate_answer(request: AnswerEvaluationRequest):
@@ -450,12 +693,13 @@ async def evaluate_answer(request: AnswerEvaluationRequest):
     The evaluation includes accuracy, completeness, and feedback.
     """
     try:
-        logger.info("=" * 80)
-        logger.info(f"📝 EVALUATING ANSWER")
-        logger.info(f"   Room: {request.room_id}")
-        logger.info(f"   Question: {request.question[:100]}...")
-        logger.info(f"   Answer length: {len(request.answer)} chars")
-        logger.info("=" * 80)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("=" * 80)
+            logger.debug("📝 EVALUATING ANSWER")
+            logger.debug("   Room: %s", request.room_id)
+            logger.debug("   Question: %s...", request.question[:100])
+            logger.debug("   Answer length: %s chars", len(request.answer))
+            logger.debug("=" * 80)
         
         # Get or create evaluator for this session
         evaluator = get_evaluator()
@@ -469,22 +713,17 @@ async def evaluate_answer(request: AnswerEvaluationRequest):
             context=f"Candidate ID: {request.candidate_id}"
         )
         
-        logger.info(f"✅ Evaluation complete")
-        logger.info(f"   Score: {evaluation.get('score', 0)}/10")
-        logger.info(f"   Correct: {evaluation.get('is_correct', False)}")
-        logger.info(f"   Partial: {evaluation.get('is_partial', False)}")
+        logger.info("✅ Evaluation complete - score %s/10", evaluation.get('score', 0))
         
         return {
             "success": True,
-            "evaluation": evaluation,
+            "evaluation": AnswerEvaluator.to_json(evaluation),
             "room_id": request.room_id,
             "question_number": request.question_number
         }
         
     except Exception as e:
-        logger.error(f"❌ Answer evaluation failed: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Answer evaluation failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/complete-interview")
@@ -499,11 +738,12 @@ async def complete_interview(request: CompleteInterviewRequest):
     - Hiring recommendation
     """
     try:
-        logger.info("=" * 80)
-        logger.info(f"🏁 COMPLETING INTERVIEW")
-        logger.info(f"   Room: {request.room_id}")
-        logger.info(f"   Session: {request.session_id}")
-        logger.info("=" * 80)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("=" * 80)
+            logger.debug("🏁 COMPLETING INTERVIEW")
+            logger.debug("   Room: %s", request.room_id)
+            logger.debug("   Session: %s", request.session_id)
+            logger.debug("=" * 80)
         
         # Get evaluator
         evaluator = get_evaluator()
@@ -511,12 +751,7 @@ async def complete_interview(request: CompleteInterviewRequest):
         # Calculate overall performance
         performance = evaluator.calculate_overall_performance()
         
-        logger.info(f"✅ Performance calculated")
-        logger.info(f"   Total Score: {performance.get('total_score', 0)}%")
-        logger.info(f"   Total Questions: {performance.get('total_questions', 0)}")
-        logger.info(f"   Correct: {performance.get('correct_answers', 0)}")
-        logger.info(f"   Wrong: {performance.get('wrong_answers', 0)}")
-        logger.info(f"   Partial: {performance.get('partial_answers', 0)}")
+        logger.info("✅ Performance calculated - total score %s%%", performance.get('total_score', 0))
         
         return {
             "success": True,
@@ -542,9 +777,7 @@ async def complete_interview(request: CompleteInterviewRequest):
         }
         
     except Exception as e:
-        logger.error(f"❌ Complete interview failed: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Complete interview failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/interview-stats/{room_id}")
@@ -579,7 +812,7 @@ async def get_interview_stats(room_id: str):
         }
         
     except Exception as e:
-        logger.error(f"❌ Get stats failed: {e}")
+        logger.error("❌ Get stats failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/save-session-report")
@@ -590,13 +823,14 @@ async def save_session_report(request: SessionReportRequest):
     This is called by the agent when the interview ends.
     """
     try:
-        logger.info("=" * 80)
-        logger.info("💾 SAVING SESSION REPORT")
-        logger.info(f"   Room: {request.room_id}")
-        logger.info(f"   Candidate: {request.candidate_name}")
-        logger.info(f"   Total Score: {request.performance.get('total_score', 0)}%")
-        logger.info(f"   Questions: {request.performance.get('total_questions', 0)}")
-        logger.info("=" * 80)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("=" * 80)
+            logger.debug("💾 SAVING SESSION REPORT")
+            logger.debug("   Room: %s", request.room_id)
+            logger.debug("   Candidate: %s", request.candidate_name)
+            logger.debug("   Total Score: %s%%", request.performance.get('total_score', 0))
+            logger.debug("   Questions: %s", request.performance.get('total_questions', 0))
+            logger.debug("=" * 80)
         
         # Here you would save to your database
         # Example for MongoDB:
@@ -621,22 +855,23 @@ async def save_session_report(request: SessionReportRequest):
         """
         
         # For now, just log it
-        logger.info("=" * 80)
-        logger.info("📊 SESSION REPORT:")
-        logger.info(f"   Candidate: {request.candidate_name} ({request.candidate_email})")
-        logger.info(f"   Performance: {request.performance.get('total_score', 0)}% score")
-        logger.info(f"   Correct: {request.performance.get('correct_answers', 0)}")
-        logger.info(f"   Wrong: {request.performance.get('wrong_answers', 0)}")
-        logger.info(f"   Transcript entries: {len(request.transcript)}")
-        logger.info(f"   Evaluated responses: {len(request.responses)}")
-        logger.info(f"   Duration: {request.start_time} to {request.end_time}")
-        logger.info("=" * 80)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("=" * 80)
+            logger.debug("📊 SESSION REPORT:")
+            logger.debug("   Candidate: %s (%s)", request.candidate_name, request.candidate_email)
+            logger.debug("   Performance: %s%% score", request.performance.get('total_score', 0))
+            logger.debug("   Correct: %s", request.performance.get('correct_answers', 0))
+            logger.debug("   Wrong: %s", request.performance.get('wrong_answers', 0))
+            logger.debug("   Transcript entries: %s", len(request.transcript))
+            logger.debug("   Evaluated responses: %s", len(request.responses))
+            logger.debug("   Duration: %s to %s", request.start_time, request.end_time)
+            logger.debug("=" * 80)
         
         # Store session report in memory (can be moved to database)
         if request.room_id not in active_sessions:
             active_sessions[request.room_id] = {}
         
-        active_sessions[request.room_id]['session_report'] = {
+        session_report = {
             "room_id": request.room_id,
             "candidate_id": request.candidate_id,
             "candidate_name": request.candidate_name,
@@ -649,33 +884,34 @@ async def save_session_report(request: SessionReportRequest):
             "end_time": request.end_time,
             "saved_at": datetime.now().isoformat()
         }
+        # Kept resident zlib-compressed: transcripts are text-heavy and reads are rare
+        report_json = orjson.dumps(session_report)
+        active_sessions[request.room_id]['session_report'] = zlib.compress(report_json, SESSION_REPORT_COMPRESS_LEVEL)
+        if redis_client is not None:
+            await redis_client.set(
+                f"session_report:{request.room_id}",
+                report_json,
+                ex=SESSION_REPORT_TTL_S
+            )
         
         # Notify WebSocket clients if connected
-        if request.room_id in active_sessions:
-            ws = active_sessions[request.room_id].get('websocket')
-            if ws:
-                try:
-                    await ws.send_json({
-                        'type': 'session_complete',
-                        'room_id': request.room_id,
-                        'performance': request.performance,
-                        'message': 'Interview session completed and report saved'
-                    })
-                    logger.info("✅ WebSocket notification sent to frontend")
-                except Exception as e:
-                    logger.warning(f"⚠️ Could not send WebSocket notification: {e}")
+        if await _broadcast(request.room_id, {
+            'type': 'session_complete',
+            'room_id': request.room_id,
+            'performance': request.performance,
+            'message': 'Interview session completed and report saved'
+        }):
+            logger.info("✅ WebSocket notification sent to frontend")
         
         return {
             "success": True,
             "message": "Session report saved successfully",
             "room_id": request.room_id,
-            "saved_at": datetime.now().isoformat()
+            "saved_at": session_report["saved_at"]
         }
         
     except Exception as e:
-        logger.error(f"❌ Save session report failed: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Save session report failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/session-report/{room_id}")
@@ -686,12 +922,22 @@ async def get_session_report(room_id: str):
     try:
         # Check in-memory storage first
         if room_id in active_sessions and 'session_report' in active_sessions[room_id]:
-            logger.info(f"✅ Found session report for room: {room_id}")
+            logger.info("✅ Found session report for room: %s", room_id)
             return {
                 "success": True,
-                "report": active_sessions[room_id]['session_report']
+                "report": orjson.loads(zlib.decompress(active_sessions[room_id]['session_report']))
             }
         
+        # Then the shared store, in case another worker saved it
+        if redis_client is not None:
+            raw = await redis_client.get(f"session_report:{room_id}")
+            if raw is not None:
+                logger.info("✅ Found session report in Redis for room: %s", room_id)
+                return {
+                    "success": True,
+                    "report": orjson.loads(raw)
+                }
+        
         # Example: Fetch from database
         """
         report = await db.session_reports.find_one({"room_id": room_id})
@@ -709,7 +955,7 @@ async def get_session_report(room_id: str):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"❌ Get session report failed: {e}")
+        logger.error("❌ Get session report failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/health")
@@ -724,6 +970,19 @@ async def health():
     }
 
 if __name__ == "__main__":
+    import sys
     import uvicorn
-    logger.info("🚀 Starting Backend Server on port 8001")
-    uvicorn.run(app, host="0.0.0.0", port=8001, log_level="info")
\ No newline at end of file
+    # One worker by default: WebSocket subscribers, active sessions, agent status and
+    # evaluator stats are per-process even with REDIS_URL. Set WEB_CONCURRENCY to opt in.
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    logger.info("🚀 Starting Backend Server on port 8001 (%s workers)", workers)
+    # Workers need the app as an import string; uvloop/httptools come with uvicorn[standard]
+    uvicorn.run(
+        "server:app",
+        host="0.0.0.0",
+        port=8001,
+        log_level=os.getenv("UVICORN_LOG_LEVEL", "info"),
+        loop="uvloop" if sys.platform != "win32" else "asyncio",
+        http="httptools",
+        workers=workers
+    )
\ No newline at end of file
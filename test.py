@@ -40,7 +40,7 @@ try:
     try:
         print("\n📘 Parsed JSON Response:")
         print(json.dumps(response.json(), indent=2))
-    except:
+    except ValueError:
         print("⚠ Could not parse JSON response")
 
 except Exception as e:
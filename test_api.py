@@ -1,16 +1,26 @@
 # test_api.py - Test API endpoints
 import requests
 import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 BASE_URL = "http://localhost:8001"
 
+# One keep-alive connection pool for the whole run instead of a new TCP connection per request
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=10,
+    max_retries=Retry(total=2, backoff_factor=0.1)
+))
+
 def test_health():
     """Test health endpoint"""
     print("\n" + "=" * 80)
     print("🏥 Testing Health Endpoint")
     print("=" * 80)
     
-    response = requests.get(f"{BASE_URL}/health")
+    response = _SESSION.get(f"{BASE_URL}/health")
     print(f"Status: {response.status_code}")
     print(f"Response: {json.dumps(response.json(), indent=2)}")
     return response.status_code == 200
@@ -39,7 +49,7 @@ def test_evaluate_answer():
     print(f"Answer: {payload['answer'][:100]}...")
     
     try:
-        response = requests.post(
+        response = _SESSION.post(
             f"{BASE_URL}/api/evaluate-answer",
             json=payload,
             headers={"Content-Type": "application/json"}
@@ -86,7 +96,7 @@ def test_interview_stats():
     print("=" * 80)
     
     try:
-        response = requests.get(f"{BASE_URL}/api/interview-stats/test_room_123")
+        response = _SESSION.get(f"{BASE_URL}/api/interview-stats/test_room_123")
         print(f"Status: {response.status_code}")
         
         if response.status_code == 200:
@@ -121,7 +131,7 @@ def test_complete_interview():
     }
     
     try:
-        response = requests.post(
+        response = _SESSION.post(
             f"{BASE_URL}/api/complete-interview",
             json=payload,
             headers={"Content-Type": "application/json"}
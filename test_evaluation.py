@@ -12,13 +12,12 @@ async def test_evaluator():
     print("🧪 TESTING ANSWER EVALUATOR")
     print("=" * 80)
     
-    # Test Case 1: Good answer about SOLID principles
-    print("\n📝 Test Case 1: SOLID Principles (Good Answer)")
-    print("-" * 80)
-    
-    evaluation1 = await evaluator.evaluate_answer(
-        question="Can you explain the SOLID principles in software engineering?",
-        answer="""SOLID is an acronym for five design principles:
+    # The three cases are independent; run their LLM calls concurrently
+    evaluation1, evaluation2, evaluation3 = await asyncio.gather(
+        # Test Case 1: Good answer about SOLID principles
+        evaluator.evaluate_answer(
+            question="Can you explain the SOLID principles in software engineering?",
+            answer="""SOLID is an acronym for five design principles:
         
         1. Single Responsibility Principle - A class should have only one reason to change
         2. Open/Closed Principle - Software entities should be open for extension but closed for modification
@@ -27,10 +26,43 @@ async def test_evaluator():
         5. Dependency Inversion Principle - High-level modules shouldn't depend on low-level modules
         
         These principles help create maintainable and scalable code.""",
-        expected_keywords=["Single Responsibility", "Open/Closed", "Liskov", "Interface Segregation", "Dependency Inversion"],
-        difficulty_level="medium"
+            expected_keywords=["Single Responsibility", "Open/Closed", "Liskov", "Interface Segregation", "Dependency Inversion"],
+            difficulty_level="medium"
+        ),
+        # Test Case 2: Weak answer about React hooks
+        evaluator.evaluate_answer(
+            question="What are React hooks and why are they useful?",
+            answer="React hooks are functions that let you use state. They are useful.",
+            expected_keywords=["useState", "useEffect", "functional components", "lifecycle"],
+            difficulty_level="medium"
+        ),
+        # Test Case 3: Excellent answer about databases
+        evaluator.evaluate_answer(
+            question="How do database indexes improve query performance?",
+            answer="""Database indexes improve query performance by creating a separate data structure 
+        that stores a subset of the table's data in a sorted manner. This allows the database to 
+        quickly locate rows without scanning the entire table.
+        
+        Indexes work like a book's index - instead of reading every page, you can jump directly to 
+        the relevant section. They're particularly effective for:
+        - WHERE clause filtering
+        - JOIN operations
+        - ORDER BY sorting
+        
+        However, indexes also have trade-offs:
+        - They take up additional storage space
+        - INSERT/UPDATE/DELETE operations become slower due to index maintenance
+        
+        Common index types include B-tree, Hash, and Bitmap indexes, each optimized for different use cases.""",
+            expected_keywords=["B-tree", "search", "performance", "storage"],
+            difficulty_level="medium"
+        )
     )
     
+    # Test Case 1: Good answer about SOLID principles
+    print("\n📝 Test Case 1: SOLID Principles (Good Answer)")
+    print("-" * 80)
+    
     print(f"✅ Score: {evaluation1['score']}/10")
     print(f"✅ Correct: {evaluation1['is_correct']}")
     print(f"✅ Feedback: {evaluation1['feedback']}")
@@ -40,13 +72,6 @@ async def test_evaluator():
     print("\n📝 Test Case 2: React Hooks (Weak Answer)")
     print("-" * 80)
     
-    evaluation2 = await evaluator.evaluate_answer(
-        question="What are React hooks and why are they useful?",
-        answer="React hooks are functions that let you use state. They are useful.",
-        expected_keywords=["useState", "useEffect", "functional components", "lifecycle"],
-        difficulty_level="medium"
-    )
-    
     print(f"✅ Score: {evaluation2['score']}/10")
     print(f"✅ Correct: {evaluation2['is_correct']}")
     print(f"✅ Partial: {evaluation2['is_partial']}")
@@ -57,27 +82,6 @@ async def test_evaluator():
     print("\n📝 Test Case 3: Database Indexing (Excellent Answer)")
     print("-" * 80)
     
-    evaluation3 = await evaluator.evaluate_answer(
-        question="How do database indexes improve query performance?",
-        answer="""Database indexes improve query performance by creating a separate data structure 
-        that stores a subset of the table's data in a sorted manner. This allows the database to 
-        quickly locate rows without scanning the entire table.
-        
-        Indexes work like a book's index - instead of reading every page, you can jump directly to 
-        the relevant section. They're particularly effective for:
-        - WHERE clause filtering
-        - JOIN operations
-        - ORDER BY sorting
-        
-        However, indexes also have trade-offs:
-        - They take up additional storage space
-        - INSERT/UPDATE/DELETE operations become slower due to index maintenance
-        
-        Common index types include B-tree, Hash, and Bitmap indexes, each optimized for different use cases.""",
-        expected_keywords=["B-tree", "search", "performance", "storage"],
-        difficulty_level="medium"
-    )
-    
     print(f"✅ Score: {evaluation3['score']}/10")
     print(f"✅ Correct: {evaluation3['is_correct']}")
     print(f"✅ Feedback: {evaluation3['feedback']}")
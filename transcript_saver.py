@@ -5,41 +5,184 @@ Transcript Saver Module for Interview Agent Backend
 Simple functional approach for saving interview transcripts.
 """
 
+import asyncio
+import atexit
+import gzip
+from array import array
 import time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import httpx
+import orjson
 import uuid
 import os
+import queue
+import random
+import sys
+import tempfile
+import threading
 import logging
+from typing import Dict, Optional
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# ========================== GLOBAL TRANSCRIPT BUFFER ==========================
-transcript_buffer = []
+# ========================== PER-ROOM TRANSCRIPT BUFFERS ==========================
+# Memory ceiling for long sessions; at the cap the oldest unsent messages are moved to a
+# dead-letter file in chunks (see _RoomBuffer.drop_oldest)
+TRANSCRIPT_MAX_MSGS = int(os.getenv("TRANSCRIPT_MAX_MSGS", "10000"))
+
+
+class _RoomBuffer:
+    """
+    One room's transcript, stored column-wise (one entry per message).
+    Dicts are only built for get_transcript() and the upload payload.
+    """
+    
+    __slots__ = ("room_id", "senders", "texts", "timestamps", "sent_offset", "lock")
+    
+    def __init__(self, room_id: Optional[str] = None):
+        self.room_id = room_id
+        self.senders = []
+        self.texts = []
+        self.timestamps = array('d')
+        # Messages already uploaded and dropped from the buffer; sent as start_offset so
+        # each save carries only the new slice of the interview
+        self.sent_offset = 0
+        # Appends come from the event loop, sync saves may run in worker threads.
+        # Reentrant so trimming can happen inside add_message().
+        self.lock = threading.RLock()
+    
+    def entries(self, count: Optional[int] = None) -> list:
+        """Build the message dicts from the columns (only the first count if given)"""
+        columns = (self.senders, self.texts, self.timestamps)
+        if count is not None:
+            columns = tuple(column[:count] for column in columns)
+        return [
+            {"sender": sender, "text": text, "timestamp": timestamp}
+            for sender, text, timestamp in zip(*columns)
+        ]
+    
+    def mark_sent(self, end: int) -> None:
+        """Remove messages before interview position end after a successful upload"""
+        with self.lock:
+            # Anything already trimmed while the request was in flight is skipped
+            count = max(0, end - self.sent_offset)
+            del self.senders[:count]
+            del self.texts[:count]
+            del self.timestamps[:count]
+            self.sent_offset += count
+    
+    def drop_oldest(self, count: int) -> bool:
+        """
+        Move the oldest unsent messages to a dead-letter file once the buffer is full.
+        
+        Args:
+            count: Number of messages to move out of the buffer
+        
+        Returns:
+            bool: True if they were written and trimmed; False if the write failed,
+            in which case they stay buffered (past the cap) rather than being lost
+        """
+        with self.lock:
+            payload = {
+                "interview_id": None,
+                "room_id": self.room_id,
+                "transcript": self.entries(count),
+                "start_offset": self.sent_offset
+            }
+            if _dead_letter(payload) is None:
+                logger.error(f"❌ Transcript buffer full ({TRANSCRIPT_MAX_MSGS} messages) and overflow could not be written; keeping it buffered")
+                return False
+            # Persisted with its start_offset, so it is accounted for like an upload
+            self.mark_sent(self.sent_offset + count)
+        logger.warning(f"⚠️ Transcript buffer full ({TRANSCRIPT_MAX_MSGS} messages), moved {count} oldest unsent messages to a dead-letter file")
+        return True
+
+
+# room_id -> buffer; None holds messages added without a room
+_buffers: Dict[Optional[str], _RoomBuffer] = {}
+_buffers_lock = threading.Lock()
+
+
+def _get_buffer(room_id: Optional[str], create: bool = False) -> Optional[_RoomBuffer]:
+    """Look up a room's buffer, optionally creating it"""
+    buf = _buffers.get(room_id)
+    if buf is None and create:
+        with _buffers_lock:
+            buf = _buffers.get(room_id)
+            if buf is None:
+                buf = _buffers[room_id] = _RoomBuffer(room_id)
+    return buf
+
+# Payloads are pre-serialized with orjson and sent as raw bytes
+_JSON_HEADERS = {"Content-Type": "application/json"}
+# Opt-in: gzip bodies above the threshold (the save-transcript API must accept Content-Encoding: gzip)
+TRANSCRIPT_GZIP = os.getenv("TRANSCRIPT_GZIP", "").lower() in ("1", "true", "yes")
+GZIP_MIN_BYTES = 4096
+_GZIP_HEADERS = {**_JSON_HEADERS, "Content-Encoding": "gzip"}
+
+# Keep-alive session for save_transcript(), so repeated saves reuse the connection
+SAVE_TIMEOUT_S = 10
+# Timeouts and 5xx responses are retried with exponential backoff (0.5s, 1s, ... +/-20% jitter);
+# payloads that still fail are written to TRANSCRIPT_DEAD_LETTER_DIR for offline recovery
+SAVE_ATTEMPTS = 3
+SAVE_BACKOFF_S = 0.5
+TRANSCRIPT_DEAD_LETTER_DIR = os.getenv("TRANSCRIPT_DEAD_LETTER_DIR", tempfile.gettempdir())
+_session = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=[502, 503, 504])
+)
+_session.mount("http://", _adapter)
+_session.mount("https://", _adapter)
+atexit.register(_session.close)
+
+# Shared async HTTP client for save_transcript_async(), created on first use
+_http_client: httpx.AsyncClient = None
+# Strong references to fire-and-forget saves so they aren't garbage-collected mid-flight
+_pending_saves = set()
+
+# Background sender for callers without an event loop: queue_save() enqueues
+# (interview_id, room_id, frontend_url) and one daemon thread runs save_transcript()
+_send_queue: "queue.Queue[tuple]" = queue.Queue()
+_sender_thread: Optional[threading.Thread] = None
 
 
 # ========================== MESSAGE APPEND FUNCTIONS ==========================
-def add_message(sender: str, text: str):
+def add_message(sender: str, text: str, room_id: str = None):
     """
-    Add a message to the global transcript buffer.
+    Add a message to a room's transcript buffer.
     
     Args:
         sender: "candidate" or "agent"
         text: The message text
+        room_id: Room the message belongs to (None for the shared default buffer)
     """
-    if not text or not text.strip():
+    # Most messages arrive already trimmed; only strip (and copy) when needed
+    if text and (text[0].isspace() or text[-1].isspace()):
+        text = text.strip()
+    if not text:
         logger.warning("⚠️ Attempted to add empty message, skipping")
         return
     
-    transcript_buffer.append({
-        "sender": sender,
-        "text": text.strip(),
-        "timestamp": time.time()
-    })
+    # Only a couple of distinct senders; keep one shared string for each
+    sender = sys.intern(sender)
+    timestamp = time.time()
+    buf = _get_buffer(room_id, create=True)
+    with buf.lock:
+        if len(buf.senders) >= TRANSCRIPT_MAX_MSGS:
+            buf.drop_oldest(max(1, TRANSCRIPT_MAX_MSGS // 10))
+        buf.senders.append(sender)
+        buf.texts.append(text)
+        buf.timestamps.append(timestamp)
+        size = len(buf.senders)
     
     logger.info(f"💬 Transcript: [{sender}] {text[:100]}{'...' if len(text) > 100 else ''}")
-    logger.debug(f"📊 Buffer size: {len(transcript_buffer)} messages")
+    logger.debug(f"📊 Buffer size: {size} messages")
 
 
 # ========================== TRANSCRIPT SAVE FUNCTION ==========================
@@ -49,16 +192,171 @@ def save_transcript(interview_id: str = None, room_id: str = None, frontend_url:
     
     Args:
         interview_id: Optional interview ID (will generate UUID if not provided)
-        room_id: Optional room ID
+        room_id: Room whose buffer is saved
         frontend_url: Frontend URL to send the transcript to (defaults to env var or localhost)
     
     Returns:
         bool: True if successful, False otherwise
     """
-    if not transcript_buffer:
+    buf = _get_buffer(room_id)
+    if buf is None or not buf.senders:
         logger.warning("⚠️ No messages in transcript buffer to save")
         return False
     
+    api_url, payload = _build_request(interview_id, room_id, frontend_url, buf)
+    interview_id = payload["interview_id"]
+    
+    logger.info("=" * 80)
+    logger.info(f"💾 SAVING TRANSCRIPT TO NEXT.JS API")
+    logger.info(f"   API URL: {api_url}")
+    logger.info(f"   Interview ID: {interview_id}")
+    logger.info(f"   Room ID: {room_id}")
+    logger.info(f"   Total Messages: {len(payload['transcript'])}")
+    logger.info("=" * 80)
+    
+    # Debug: preview the first messages (f-strings only built when DEBUG is on)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("🧾 Transcript preview (first 3 messages):")
+        for i, msg in enumerate(payload["transcript"][:3]):
+            logger.debug(f"   [{i+1}] {msg['sender']}: {msg['text'][:50]}...")
+    
+    body, headers = _encode_body(payload)
+    
+    for attempt in range(SAVE_ATTEMPTS):
+        if attempt:
+            delay = _backoff_delay(attempt)
+            logger.warning(f"🔁 Retrying transcript save in {delay:.2f}s (attempt {attempt + 1}/{SAVE_ATTEMPTS})")
+            time.sleep(delay)
+        res = None
+        try:
+            res = _session.post(
+                api_url,
+                data=body,
+                headers=headers,
+                timeout=SAVE_TIMEOUT_S
+            )
+        except requests.exceptions.Timeout:
+            logger.error("=" * 80)
+            logger.error("❌ TIMEOUT WHILE SAVING TRANSCRIPT")
+            logger.error(f"   API URL: {api_url}")
+            logger.error("=" * 80)
+            continue
+        except requests.exceptions.ConnectionError:
+            logger.error("=" * 80)
+            logger.error(f"❌ CONNECTION ERROR: Could not connect to API")
+            logger.error(f"   API URL: {api_url}")
+            logger.error("   Please check if the Next.js API is running")
+            logger.error("=" * 80)
+            # The session's adapter has already retried the connection
+            break
+        except Exception as e:
+            logger.error("=" * 80)
+            logger.error(f"❌ ERROR SAVING TRANSCRIPT: {e}")
+            logger.error(f"   API URL: {api_url}")
+            import traceback
+            logger.error(traceback.format_exc())
+            logger.error("=" * 80)
+            break
+        
+        logger.info(f"📡 API Response: HTTP {res.status_code}")
+        if res.status_code < 500:
+            break
+    
+    if res is not None and res.status_code == 200:
+        logger.info("=" * 80)
+        logger.info("✅ TRANSCRIPT SAVED SUCCESSFULLY!")
+        logger.info(f"   Interview ID: {interview_id}")
+        logger.info(f"   Room ID: {room_id}")
+        logger.info(f"   Messages sent: {len(payload['transcript'])}")
+        logger.info("=" * 80)
+        # Drop only what was sent; messages added during the request wait for the next save
+        buf.mark_sent(payload["start_offset"] + len(payload["transcript"]))
+        return True
+    
+    if res is not None:
+        logger.error("=" * 80)
+        logger.error(f"❌ FAILED TO SAVE TRANSCRIPT: HTTP {res.status_code}")
+        logger.error(f"   Response: {res.text}")
+        logger.error("=" * 80)
+    _dead_letter(payload)
+    return False
+
+
+async def save_transcript_async(interview_id: str = None, room_id: str = None, frontend_url: str = None) -> bool:
+    """
+    Async version of save_transcript() for code running on an event loop.
+    
+    Posts through a shared httpx.AsyncClient, so the upload never blocks the loop.
+    Only the messages that were sent are removed from the buffer; anything added
+    while the request was in flight stays for the next save.
+    
+    Args:
+        interview_id: Optional interview ID (will generate UUID if not provided)
+        room_id: Room whose buffer is saved
+        frontend_url: Frontend URL to send the transcript to (defaults to env var or localhost)
+    
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    global _http_client
+    buf = _get_buffer(room_id)
+    if buf is None or not buf.senders:
+        logger.warning("⚠️ No messages in transcript buffer to save")
+        return False
+    
+    api_url, payload = _build_request(interview_id, room_id, frontend_url, buf)
+    sent = len(payload["transcript"])
+    logger.info("💾 Saving transcript (%s messages) to %s", sent, api_url)
+    
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(timeout=SAVE_TIMEOUT_S)
+    
+    body, headers = _encode_body(payload)
+    for attempt in range(SAVE_ATTEMPTS):
+        if attempt:
+            await asyncio.sleep(_backoff_delay(attempt))
+        res = None
+        try:
+            res = await _http_client.post(api_url, content=body, headers=headers)
+        except httpx.TimeoutException:
+            logger.error("❌ TIMEOUT WHILE SAVING TRANSCRIPT: %s (attempt %s/%s)", api_url, attempt + 1, SAVE_ATTEMPTS)
+            continue
+        except httpx.ConnectError:
+            # Unlike the requests session, the httpx client has no transport-level retries
+            logger.error("❌ CONNECTION ERROR: Could not connect to API at %s - is the Next.js API running? (attempt %s/%s)", api_url, attempt + 1, SAVE_ATTEMPTS)
+            continue
+        except Exception as e:
+            logger.exception("❌ ERROR SAVING TRANSCRIPT: %s (%s)", e, api_url)
+            break
+        if res.status_code < 500:
+            break
+        logger.warning("⚠️ Transcript save got HTTP %s (attempt %s/%s)", res.status_code, attempt + 1, SAVE_ATTEMPTS)
+    
+    if res is not None and res.status_code == 200:
+        logger.info("✅ Transcript saved - interview %s, room %s, %s messages", payload["interview_id"], room_id, sent)
+        buf.mark_sent(payload["start_offset"] + sent)
+        return True
+    
+    if res is not None:
+        logger.error("❌ FAILED TO SAVE TRANSCRIPT: HTTP %s - %s", res.status_code, res.text)
+    await asyncio.to_thread(_dead_letter, payload)
+    return False
+
+
+def _build_request(interview_id: str, room_id: str, frontend_url: str, buf: _RoomBuffer) -> tuple:
+    """
+    Resolve the save-transcript URL and payload for a room's buffer.
+    
+    Args:
+        interview_id: Interview ID, or None to generate a UUID
+        room_id: Room ID
+        frontend_url: Frontend base URL, or None for FRONTEND_URL / localhost
+        buf: The room's buffer
+    
+    Returns:
+        tuple: (api_url, payload); the payload holds a snapshot of the unsent messages
+        and start_offset, the number of messages earlier saves already uploaded
+    """
     # Generate interview_id if not provided
     if not interview_id:
         interview_id = str(uuid.uuid4())
@@ -72,97 +370,133 @@ def save_transcript(interview_id: str = None, room_id: str = None, frontend_url:
     
     api_url = f"{base_url}/api/interviews/save-transcript"
     
-    # Prepare payload
-    payload = {
-        "interview_id": interview_id,
-        "room_id": room_id,
-        "transcript": transcript_buffer
-    }
+    # Prepare payload from one consistent snapshot of the buffer
+    with buf.lock:
+        payload = {
+            "interview_id": interview_id,
+            "room_id": room_id,
+            "transcript": buf.entries(),
+            "start_offset": buf.sent_offset
+        }
+    return api_url, payload
+
+
+def _encode_body(payload: dict) -> tuple:
+    """
+    Serialize a save-transcript payload, gzipping large bodies when TRANSCRIPT_GZIP is set.
+    
+    Args:
+        payload: Payload from _build_request()
     
+    Returns:
+        tuple: (body bytes, request headers)
+    """
+    body = orjson.dumps(payload)
+    if TRANSCRIPT_GZIP and len(body) > GZIP_MIN_BYTES:
+        # Level 1: most of the ratio on repetitive JSON for a fraction of the CPU
+        return gzip.compress(body, compresslevel=1), _GZIP_HEADERS
+    return body, _JSON_HEADERS
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Delay before retry number attempt (1-based): exponential with +/-20% jitter"""
+    return SAVE_BACKOFF_S * 2 ** (attempt - 1) * random.uniform(0.8, 1.2)
+
+
+def _dead_letter(payload: dict) -> Optional[str]:
+    """
+    Write a payload that could not be uploaded to TRANSCRIPT_DEAD_LETTER_DIR.
+    
+    Args:
+        payload: Payload from _build_request(), or buffer overflow from drop_oldest()
+    
+    Returns:
+        str: Path of the written file, or None if it could not be written
+    """
+    path = os.path.join(
+        TRANSCRIPT_DEAD_LETTER_DIR,
+        f"transcript_{payload['interview_id'] or payload['room_id']}_{uuid.uuid4().hex[:8]}.json"
+    )
     try:
-        logger.info("=" * 80)
-        logger.info(f"💾 SAVING TRANSCRIPT TO NEXT.JS API")
-        logger.info(f"   API URL: {api_url}")
-        logger.info(f"   Interview ID: {interview_id}")
-        logger.info(f"   Room ID: {room_id}")
-        logger.info(f"   Total Messages: {len(transcript_buffer)}")
-        logger.info("=" * 80)
-        
-        # Debug: Print final transcript buffer
-        logger.debug(f"🧾 Transcript preview (first 3 messages):")
-        for i, msg in enumerate(transcript_buffer[:3]):
-            logger.debug(f"   [{i+1}] {msg['sender']}: {msg['text'][:50]}...")
-        
-        res = requests.post(
-            api_url,
-            json=payload,
-            headers={"Content-Type": "application/json"},
-            timeout=10
-        )
-        
-        logger.info(f"📡 API Response: HTTP {res.status_code}")
-        
-        if res.status_code == 200:
-            logger.info("=" * 80)
-            logger.info("✅ TRANSCRIPT SAVED SUCCESSFULLY!")
-            logger.info(f"   Interview ID: {interview_id}")
-            logger.info(f"   Room ID: {room_id}")
-            logger.info(f"   Messages sent: {len(transcript_buffer)}")
-            logger.info("=" * 80)
-            # Clear buffer after successful save to prepare for next interview
-            clear_buffer()
-            return True
-        else:
-            logger.error("=" * 80)
-            logger.error(f"❌ FAILED TO SAVE TRANSCRIPT: HTTP {res.status_code}")
-            logger.error(f"   Response: {res.text}")
-            logger.error("=" * 80)
-            return False
-            
-    except requests.exceptions.Timeout:
-        logger.error("=" * 80)
-        logger.error("❌ TIMEOUT WHILE SAVING TRANSCRIPT")
-        logger.error(f"   API URL: {api_url}")
-        logger.error("=" * 80)
-        return False
-    except requests.exceptions.ConnectionError:
-        logger.error("=" * 80)
-        logger.error(f"❌ CONNECTION ERROR: Could not connect to API")
-        logger.error(f"   API URL: {api_url}")
-        logger.error("   Please check if the Next.js API is running")
-        logger.error("=" * 80)
-        return False
-    except Exception as e:
-        logger.error("=" * 80)
-        logger.error(f"❌ ERROR SAVING TRANSCRIPT: {e}")
-        logger.error(f"   API URL: {api_url}")
-        import traceback
-        logger.error(traceback.format_exc())
-        logger.error("=" * 80)
-        return False
+        os.makedirs(TRANSCRIPT_DEAD_LETTER_DIR, exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(payload))
+    except OSError as e:
+        logger.error(f"❌ Could not write unsent transcript to {path}: {e}")
+        return None
+    logger.warning(f"📮 Unsent transcript ({len(payload['transcript'])} messages) written to {path}")
+    return path
+
+
+def _sender_loop():
+    """Run queued saves one at a time on the background sender thread"""
+    while True:
+        interview_id, room_id, frontend_url = _send_queue.get()
+        try:
+            save_transcript(interview_id, room_id, frontend_url)
+        except Exception:
+            logger.exception("❌ Background transcript save failed")
+        finally:
+            _send_queue.task_done()
+
+
+def queue_save(interview_id: str = None, room_id: str = None, frontend_url: str = None):
+    """
+    Hand a save to the background sender thread and return immediately.
+    
+    The buffer is snapshotted when the save runs, so messages added in the
+    meantime go out with it. Use flush() to wait for queued saves.
+    
+    Args:
+        interview_id: Optional interview ID (will generate UUID if not provided)
+        room_id: Room whose buffer is saved
+        frontend_url: Frontend URL to send the transcript to (defaults to env var or localhost)
+    """
+    global _sender_thread
+    if _sender_thread is None:
+        with _buffers_lock:
+            if _sender_thread is None:
+                _sender_thread = threading.Thread(target=_sender_loop, name="transcript-sender", daemon=True)
+                _sender_thread.start()
+                # Runs before _session.close (atexit is LIFO), so queued saves still go out
+                atexit.register(flush)
+    _send_queue.put((interview_id, room_id, frontend_url))
+
+
+def flush():
+    """Block until every queued background save has been attempted"""
+    _send_queue.join()
 
 
 # ========================== HELPER FUNCTIONS ==========================
-def clear_buffer():
-    """Clear the global transcript buffer"""
-    global transcript_buffer
-    transcript_buffer = []
-    logger.info("🧹 Transcript buffer cleared")
+def clear_buffer(room_id: str = None):
+    """Drop a room's transcript buffer (call when its interview is over)"""
+    with _buffers_lock:
+        _buffers.pop(room_id, None)
+    logger.info(f"🧹 Transcript buffer cleared for room: {room_id}")
 
 
-def get_buffer_size() -> int:
-    """Get the number of messages in the buffer"""
-    return len(transcript_buffer)
+def get_buffer_size(room_id: str = None) -> int:
+    """Get the number of messages in a room's buffer"""
+    buf = _get_buffer(room_id)
+    return len(buf.senders) if buf else 0
 
 
-def get_transcript() -> list:
+def get_transcript(room_id: str = None) -> list:
     """
-    Get the current transcript buffer.
+    Get a room's current transcript buffer.
+    
+    Args:
+        room_id: Room to read (None for the shared default buffer)
     
     Returns:
         list: List of message dictionaries with sender, text, and timestamp
     """
-    return transcript_buffer.copy()
+    buf = _get_buffer(room_id)
+    if buf is None:
+        return []
+    with buf.lock:
+        return buf.entries()
 
 
 # ========================== BACKWARD COMPATIBILITY ==========================
@@ -170,7 +504,7 @@ def get_transcript() -> list:
 class TranscriptSaver:
     """
     Class-based wrapper for backward compatibility.
-    Uses the global transcript_buffer internally.
+    Reads and writes the buffer of its own room_id.
     """
     
     def __init__(
@@ -193,17 +527,43 @@ class TranscriptSaver:
         logger.info(f"📝 TranscriptSaver initialized for room: {room_id}")
     
     def add_message(self, speaker: str, text: str, timestamp: str = None):
-        """Add message using the global function"""
-        add_message(speaker, text)
+        """Add message to this room's buffer"""
+        add_message(speaker, text, room_id=self.room_id)
     
     def save_transcript(self, auto_save: bool = False) -> bool:
-        """Save transcript using the global function"""
+        """
+        Save transcript using the global function.
+        
+        With auto_save=True this returns True immediately: the upload is scheduled via
+        save_transcript_async() when an event loop is running, otherwise it is queued
+        for the background sender thread.
+        """
+        if auto_save:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = None
+            if loop is not None:
+                task = loop.create_task(self.save_transcript_async())
+                _pending_saves.add(task)
+                task.add_done_callback(_pending_saves.discard)
+            else:
+                queue_save(self.invitation_id, self.room_id, self.frontend_url)
+            return True
         return save_transcript(
             interview_id=self.invitation_id,
             room_id=self.room_id,
             frontend_url=self.frontend_url
         )
     
+    async def save_transcript_async(self) -> bool:
+        """Save transcript without blocking the event loop"""
+        return await save_transcript_async(
+            interview_id=self.invitation_id,
+            room_id=self.room_id,
+            frontend_url=self.frontend_url
+        )
+    
     def get_message_count(self) -> int:
-        """Get message count from global buffer"""
-        return get_buffer_size()
+        """Get message count from this room's buffer"""
+        return get_buffer_size(self.room_id)